@@ -0,0 +1,201 @@
+# In-process stand-in for the parts of discord.py the personas use, for
+# benchmarks. Every API call sleeps for `latency` and is counted, per kind on
+# the FakeDiscord instance and per channel on the channel itself.
+#
+# `limits` maps a call kind to (calls, seconds): a fixed-window rate limit
+# like Discord's route buckets. A call over the limit is counted in
+# `rate_limited` and waits for the window to reset, as discord.py does when it
+# gets a 429.
+import asyncio
+import itertools
+import time
+from collections import Counter
+
+
+class FakeDiscord:
+    def __init__(self, latency=0.05, limits=None):
+        self.latency = latency
+        self.limits = limits or {}
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self._windows = {}  # kind -> (window start, calls in it)
+        self._ids = itertools.count(10_000_000)
+
+    def next_id(self):
+        return next(self._ids)
+
+    async def call(self, kind, channel=None):
+        self.calls[kind] += 1
+        if channel is not None:
+            channel.calls[kind] += 1
+        if kind in self.limits:
+            await self._rate_limit(kind)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def _rate_limit(self, kind):
+        allowed, period = self.limits[kind]
+        limited = False
+        while True:
+            now = time.monotonic()
+            start, used = self._windows.get(kind, (now, 0))
+            if now - start >= period:
+                start, used = now, 0
+            if used < allowed:
+                self._windows[kind] = (start, used + 1)
+                return
+            if not limited:
+                limited = True
+                self.rate_limited[kind] += 1
+            await asyncio.sleep(start + period - now)
+
+
+class FakeUser:
+    def __init__(self, api, user_id, name=None):
+        self.api = api
+        self.id = user_id
+        self.display_name = name or f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+
+    async def send(self, content):
+        await self.api.call("dm")
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __eq__(self, other):
+        return isinstance(other, FakeUser) and other.id == self.id
+
+
+class FakeMessage:
+    def __init__(self, channel, author, content, message_id=None):
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.guild = channel.guild
+        self.id = message_id or channel.guild.api.next_id()
+
+    async def edit(self, content=None):
+        await self.channel.guild.api.call("edit_message", self.channel)
+        self.content = content
+
+    async def delete(self):
+        await self.channel.guild.api.call("delete_message", self.channel)
+
+
+class _Typing:
+    def __init__(self, channel):
+        self.channel = channel
+
+    async def __aenter__(self):
+        await self.channel.guild.api.call("typing", self.channel)
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeChannel:
+    def __init__(self, guild, channel_id, name, overwrites=None, topic=None):
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.overwrites = overwrites or {}
+        self.topic = topic
+        self.slowmode_delay = 0
+        self.category = None
+        self.deleted = False
+        self.calls = Counter()
+        self.messages = []  # Content of every message posted by the bot
+
+    async def send(self, content, delete_after=None):
+        await self.guild.api.call("send_message", self)
+        self.messages.append(content)
+        if delete_after is not None:
+            self.calls["delete_message"] += 1  # discord.py deletes it later
+            self.guild.api.calls["delete_message"] += 1
+        return FakeMessage(self, self.guild.me, content)
+
+    async def edit(self, **fields):
+        await self.guild.api.call("edit_channel", self)
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    async def delete(self, reason=None):
+        await self.guild.api.call("delete_channel", self)
+        self.deleted = True
+        self.guild.channels.pop(self.id, None)
+
+    def typing(self):
+        return _Typing(self)
+
+    async def create_thread(self, name, type=None, invitable=True, auto_archive_duration=None, slowmode_delay=0, reason=None):
+        await self.guild.api.call("create_thread", self)
+        thread = FakeThread(self, self.guild.api.next_id(), name)
+        thread.slowmode_delay = slowmode_delay
+        self.guild.threads[thread.id] = thread
+        return thread
+
+
+class FakeCategory(FakeChannel):
+    @property
+    def channels(self):
+        return [c for c in self.guild.channels.values() if c.category is self]
+
+
+class FakeThread(FakeChannel):
+    def __init__(self, parent, thread_id, name):
+        super().__init__(parent.guild, thread_id, name)
+        self.parent = parent
+        self.members = set()
+
+    async def add_user(self, user):
+        await self.guild.api.call("add_thread_member", self)
+        self.members.add(user)
+
+    async def delete(self, reason=None):
+        await self.guild.api.call("delete_thread", self)
+        self.deleted = True
+        self.guild.threads.pop(self.id, None)
+
+
+class FakeGuild:
+    def __init__(self, api, guild_id=1):
+        self.api = api
+        self.id = guild_id
+        self.default_role = object()
+        self.me = FakeUser(api, 0, "bot")
+        self.channels = {}
+        self.threads = {}  # Not in channels, as in discord.py
+        self.system_channel = self.add_channel("general")
+
+    def add_channel(self, name, channel_id=None):
+        channel = FakeChannel(self, channel_id or self.api.next_id(), name)
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, channel_id):
+        # Threads included, like discord.Client.get_channel
+        return self.channels.get(channel_id) or self.threads.get(channel_id)
+
+    @property
+    def text_channels(self):
+        return [c for c in self.channels.values() if not isinstance(c, FakeCategory)]
+
+    @property
+    def categories(self):
+        return [c for c in self.channels.values() if isinstance(c, FakeCategory)]
+
+    async def create_category(self, name, overwrites=None, reason=None):
+        await self.api.call("create_channel")
+        category = FakeCategory(self, self.api.next_id(), name, overwrites)
+        self.channels[category.id] = category
+        return category
+
+    async def create_text_channel(self, name, overwrites=None, topic=None, reason=None, **fields):
+        await self.api.call("create_channel")
+        channel = self.add_channel(name)
+        channel.overwrites = overwrites or {}
+        channel.topic = topic
+        for field, value in fields.items():
+            setattr(channel, field, value)
+        return channel
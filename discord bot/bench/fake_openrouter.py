@@ -0,0 +1,157 @@
+# Local stand-in for OpenRouter's chat completions endpoint, for benchmarks.
+#
+# Serves POST /api/v1/chat/completions over plain HTTP/1.1 with keep-alive,
+# streaming OpenRouter-shaped SSE when "stream" is set and a JSON completion
+# otherwise. Timing and failures are configurable:
+#
+#   ttft             seconds before the first token
+#   token_rate       tokens per second after that
+#   reply_tokens     tokens per reply
+#   error_rate       share of requests answered 503
+#   rate_limit_rate  share of requests answered 429 with Retry-After
+#   disconnect_rate  share of streams cut off halfway
+#
+# Point botcore at it by setting OPENROUTER_BASE_URL to server.base_url.
+import asyncio
+import json
+import random
+
+WORDS = "the mind that does not flinch builds leverage through discipline and clear action every day".split()
+TICK = 0.02  # Tokens due within one tick are written together, like a real upstream
+
+
+class FakeOpenRouter:
+    def __init__(
+        self,
+        ttft=0.3,
+        token_rate=60.0,
+        reply_tokens=120,
+        error_rate=0.0,
+        rate_limit_rate=0.0,
+        disconnect_rate=0.0,
+        retry_after=1,
+        seed=7,
+    ):
+        self.ttft = ttft
+        self.token_rate = token_rate
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.disconnect_rate = disconnect_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.disconnects = 0
+        self.connections = 0
+        self._server = None
+
+    @property
+    def base_url(self):
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/api/v1"
+
+    async def start(self, port=0):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", port)
+        return self
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def reply_text(self):
+        words = []
+        for i in range(self.reply_tokens):
+            word = self.rng.choice(WORDS)
+            roll = self.rng.random()
+            if roll < 0.08:
+                word += "."
+            elif roll < 0.1:
+                word += ".\n"
+            words.append(word)
+        return " ".join(words).replace("\n ", "\n") + "."
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                headers = {}
+                for line in head.decode("latin-1").split("\r\n")[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                if not await self._respond(writer, json.loads(body) if body else {}):
+                    return  # Connection dropped on purpose
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, request):
+        self.requests += 1
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            self.rate_limited += 1
+            await self._send_json(writer, 429, {"error": {"message": "Rate limit exceeded"}}, [("Retry-After", str(self.retry_after))])
+            return True
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.errors += 1
+            await self._send_json(writer, 503, {"error": {"message": "No available providers"}})
+            return True
+
+        text = self.reply_text()
+        if not request.get("stream"):
+            await asyncio.sleep(self.ttft)
+            await self._send_json(writer, 200, {"choices": [{"message": {"role": "assistant", "content": text}}]})
+            return True
+
+        # Headers and a keep-alive comment go out at once, like OpenRouter
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        self._write_chunk(writer, b": OPENROUTER PROCESSING\n\n")
+        await writer.drain()
+        await asyncio.sleep(self.ttft)
+        tokens = [(" " if i else "") + word for i, word in enumerate(text.split(" "))]
+        cut = len(tokens) // 2 if self.rng.random() < self.disconnect_rate else None
+        per_tick = max(1, round(self.token_rate * TICK))
+        for start in range(0, len(tokens), per_tick):
+            if cut is not None and start >= cut:
+                self.disconnects += 1
+                await writer.drain()
+                return False
+            events = b"".join(self._event(token) for token in tokens[start:start + per_tick])
+            self._write_chunk(writer, events)
+            await writer.drain()
+            await asyncio.sleep(per_tick / self.token_rate)
+        self._write_chunk(writer, b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return True
+
+    def _event(self, token):
+        chunk = {
+            "id": "gen-fake",
+            "object": "chat.completion.chunk",
+            "choices": [{"index": 0, "delta": {"role": "assistant", "content": token}, "finish_reason": None}],
+        }
+        return b"data: " + json.dumps(chunk).encode() + b"\n\n"
+
+    def _write_chunk(self, writer, data):
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    async def _send_json(self, writer, status, payload, headers=()):
+        body = json.dumps(payload).encode()
+        reason = {200: "OK", 429: "Too Many Requests", 503: "Service Unavailable"}[status]
+        extra = "".join(f"{name}: {value}\r\n" for name, value in headers)
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n{extra}\r\n".encode()
+            + body
+        )
+        await writer.drain()
@@ -0,0 +1,201 @@
+# Offline load test: every persona's on_message against a fake Discord and a
+# local fake OpenRouter, no tokens needed.
+#
+#   python bench/load_test.py [--users 60] [--turns 3] [--personas Lux Stratos]
+#                             [--ttft 0.3] [--token-rate 60] [--reply-tokens 120]
+#                             [--error-rate 0] [--rate-limit-rate 0] [--disconnect-rate 0]
+#                             [--discord-latency 0.05] [--slots 8] [--debounce 1.0]
+#                             [--pool-size 2] [--create-limit 0]
+#
+# Each simulated user opens a session with its persona's command (!stratos,
+# !lux, ...), sends --turns messages with a little think time in between and
+# waits for each reply, then sends !close. Open latency covers the command
+# up to the welcome message being posted. Turn latency runs from the message
+# reaching on_message to the reply being fully posted, so it includes the
+# turn debounce, the completion queue and Discord's simulated latency.
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+
+from fake_discord import FakeDiscord, FakeGuild, FakeMessage, FakeUser
+from fake_openrouter import FakeOpenRouter
+
+from botcore import openrouter, persona as persona_module
+from botcore.host import load_persona
+from botcore.metrics import format_summary
+from botcore.metrics_server import rss_bytes
+from botcore.persona import PersonaBot
+from botcore.scheduler import Scheduler
+from botcore.sessions import SessionStore
+
+PERSONA_FOLDERS = ["Lux", "Dominus", "Vox", "Seraph", "Vitalis", "Stratos"]
+PROMPTS = [
+    "How do I stop procrastinating on the work that matters?",
+    "Give me a plan for this week.",
+    "What am I avoiding here?",
+    "Be blunt: what should I change first?",
+]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.opens = []
+        self.calls = []
+        self.failed = 0
+        self.peak_rss = 0
+
+
+async def sample_rss(stats, stop):
+    while not stop.is_set():
+        stats.peak_rss = max(stats.peak_rss, rss_bytes() or 0)
+        try:
+            await asyncio.wait_for(stop.wait(), 0.25)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def simulate_user(user_id, bot, guild, lobbies, args, stats, rng):
+    api = guild.api
+    user = FakeUser(api, user_id)
+    command, config = next(iter(bot.persona.session_modes.items()))
+    await asyncio.sleep(rng.uniform(0, args.ramp))
+    started = time.perf_counter()
+    await bot.on_message(FakeMessage(lobbies[config["allowed_channel_id"]], user, command))
+    stats.opens.append(time.perf_counter() - started)
+    session = bot.sessions.by_user(user_id)
+    if session is None:
+        stats.failed += args.turns
+        return
+    channel = guild.get_channel(session.channel_id)
+
+    for _ in range(args.turns):
+        await asyncio.sleep(rng.uniform(0, args.think))
+        before = sum(channel.calls.values())
+        posted = len(channel.messages)
+        started = time.perf_counter()
+        await bot.on_message(FakeMessage(channel, user, rng.choice(PROMPTS)))
+        await session.turn_task
+        stats.latencies.append(time.perf_counter() - started)
+        stats.calls.append(sum(channel.calls.values()) - before)
+        if any(m.startswith("⚠️") or "temporarily unavailable" in m or "rate limited" in m
+               for m in channel.messages[posted:]):
+            stats.failed += 1
+
+    await bot.on_message(FakeMessage(channel, user, "!close"))
+
+
+async def run(args):
+    if args.slots:
+        os.environ["LLM_MAX_IN_FLIGHT"] = str(args.slots)
+    if args.pool_size is not None:
+        os.environ["CHANNEL_POOL_SIZE"] = str(args.pool_size)
+    if args.debounce is not None:
+        persona_module.TURN_DEBOUNCE = args.debounce
+
+    upstream = await FakeOpenRouter(
+        ttft=args.ttft,
+        token_rate=args.token_rate,
+        reply_tokens=args.reply_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        disconnect_rate=args.disconnect_rate,
+    ).start()
+    os.environ["OPENROUTER_BASE_URL"] = upstream.base_url
+
+    limits = {"create_channel": (args.create_limit, 10.0)} if args.create_limit else None
+    api = FakeDiscord(latency=args.discord_latency, limits=limits)
+    guild = FakeGuild(api)
+    store = SessionStore()
+    scheduler = Scheduler()
+    scheduler.start()
+
+    bots, lobbies = [], {}
+    for folder in args.personas:
+        persona = load_persona(os.path.join(root_dir, folder))
+        bot = PersonaBot(persona, "fake-token", "fake-key", store.for_persona(persona.name), scheduler)
+        bot.client.get_channel = guild.get_channel
+        for config in persona.session_modes.values():
+            channel_id = config["allowed_channel_id"]
+            lobbies.setdefault(channel_id, guild.add_channel(f"{folder.lower()}-lobby", channel_id))
+        bots.append(bot)
+    # What on_ready does once the bot is connected
+    for bot in bots:
+        bot.prefill_channels()
+    await asyncio.gather(*(task for bot in bots for task in bot.surfaces["channel"].pool.filling.values()))
+
+    stats = Stats()
+    rss_before = rss_bytes() or 0
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(stats, stop))
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        simulate_user(1000 + i, bots[i % len(bots)], guild, lobbies, args, stats, rng)
+        for i in range(args.users)
+    ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+
+    await scheduler.stop()
+    await openrouter.close_http_client()
+    await upstream.close()
+
+    turns = len(stats.latencies)
+    print(f"{args.users} users x {args.turns} turns over {', '.join(args.personas)}")
+    print(f"  elapsed          {elapsed:8.2f} s")
+    print(f"  throughput       {turns / elapsed:8.2f} turns/s")
+    print(f"  open latency     p50 {percentile(stats.opens, 0.5):.2f} s   p99 {percentile(stats.opens, 0.99):.2f} s")
+    print(f"  turn latency     p50 {percentile(stats.latencies, 0.5):.2f} s   p99 {percentile(stats.latencies, 0.99):.2f} s")
+    print(f"  failed turns     {stats.failed}")
+    print(f"  discord calls    {sum(stats.calls) / max(turns, 1):8.2f} per turn  {dict(api.calls)}")
+    if api.rate_limited:
+        print(f"  rate limited     {dict(api.rate_limited)}")
+    print(
+        f"  openrouter       {upstream.requests} requests, {upstream.errors} 503, "
+        f"{upstream.rate_limited} 429, {upstream.disconnects} cut, {upstream.connections} connections"
+    )
+    print(f"  RSS              {rss_before / 2**20:.1f} MiB before, {stats.peak_rss / 2**20:.1f} MiB peak")
+    if args.verbose:
+        print(format_summary())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=60)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--personas", nargs="*", default=PERSONA_FOLDERS)
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which users arrive")
+    parser.add_argument("--think", type=float, default=1.0, help="max seconds between a reply and the next message")
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--token-rate", type=float, default=60.0)
+    parser.add_argument("--reply-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--disconnect-rate", type=float, default=0.0)
+    parser.add_argument("--discord-latency", type=float, default=0.05)
+    parser.add_argument("--slots", type=int, default=0, help="LLM_MAX_IN_FLIGHT (default: botcore's)")
+    parser.add_argument("--create-limit", type=int, default=0, help="channel creates allowed per 10 s (0: unlimited)")
+    parser.add_argument("--pool-size", type=int, default=None, help="CHANNEL_POOL_SIZE (default: botcore's)")
+    parser.add_argument("--debounce", type=float, default=None, help="TURN_DEBOUNCE (default: botcore's)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true", help="also print botcore's latency histograms")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Replays captured OpenRouter streams through the real stream_response:
+# SSE parser, sentence splitter and Discord sender, against a fake channel.
+#
+#   python bench/replay.py RECORDING_OR_DIR ... [--speed 0] [--rounds 5]
+#                          [--mode messages|edit] [--discord-latency 0]
+#
+# Capture first by running a bot (or bench/load_test.py) with
+# OPENROUTER_CAPTURE_DIR set. --speed 1 keeps the original timing, 10 plays
+# ten times faster, 0 (the default) plays without waiting so only our own
+# processing is measured. Run it before and after a change to compare both
+# on identical traffic.
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+
+from fake_discord import FakeDiscord, FakeGuild
+
+from botcore import openrouter
+from botcore.recording import ReplayTransport, find_recordings, load_recording
+
+
+async def replay_one(recording, args):
+    meta, chunks = recording
+    transport = ReplayTransport([recording], speed=args.speed)
+    openrouter.use_http_client(httpx.AsyncClient(transport=transport))
+    api = FakeDiscord(latency=args.discord_latency)
+    best_wall = best_cpu = float("inf")
+    for _ in range(args.rounds):
+        channel = FakeGuild(api).add_channel("replay")
+        wall, cpu = time.perf_counter(), time.process_time()
+        reply = await openrouter.stream_response(
+            [{"role": "user", "content": "replay"}],
+            channel,
+            api_key="replay",
+            model=meta.get("model", "replay"),
+            title=meta.get("persona", "replay"),
+            stream_mode=args.mode,
+        )
+        best_wall = min(best_wall, time.perf_counter() - wall)
+        best_cpu = min(best_cpu, time.process_time() - cpu)
+    await openrouter.close_http_client()
+    return reply, best_wall, best_cpu, sum(channel.calls.values())
+
+
+async def run(args):
+    paths = find_recordings(args.recordings)
+    if not paths:
+        print("No recordings found")
+        return
+    original = total_wall = total_cpu = total_bytes = 0.0
+    for path in paths:
+        recording = load_recording(path)
+        meta, chunks = recording
+        size = sum(len(data) for _, data in chunks)
+        duration = chunks[-1][0] if chunks else 0.0
+        reply, wall, cpu, calls = await replay_one(recording, args)
+        original += duration
+        total_wall += wall
+        total_cpu += cpu
+        total_bytes += size
+        print(
+            f"{os.path.basename(path)}: {meta.get('persona')} / {meta.get('model')}, "
+            f"{len(chunks)} chunks, {size / 1024:.1f} KiB, {len(reply)} chars, {calls} Discord calls"
+        )
+        print(f"  original {duration:7.2f} s   replay {wall * 1000:8.2f} ms wall   {cpu * 1000:8.2f} ms CPU")
+    print(
+        f"total: {len(paths)} streams, {total_bytes / 1024:.0f} KiB, originally {original:.1f} s; "
+        f"replayed in {total_wall * 1000:.1f} ms wall, {total_cpu * 1000:.1f} ms CPU (best of {args.rounds})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("recordings", nargs="+")
+    parser.add_argument("--speed", type=float, default=0.0)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--mode", choices=["messages", "edit"], default="messages")
+    parser.add_argument("--discord-latency", type=float, default=0.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
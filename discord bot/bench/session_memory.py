@@ -0,0 +1,96 @@
+# Memory footprint of on_message activity tracking on a busy server.
+#
+#   python bench/session_memory.py [--chatters 100000] [--sessions 1000]
+#
+# Feeds one message from each of N distinct chatters through a persona's
+# on_message (no Discord login, no OpenRouter calls) and reports how much the
+# Python heap grew. Only session owners should cost anything, so growth must
+# stay flat no matter how many people talk in the guild.
+import argparse
+import asyncio
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+
+from botcore.host import load_persona
+from botcore.persona import PersonaBot
+from botcore.scheduler import Scheduler
+from botcore.sessions import SessionStore
+
+LOBBY_CHANNEL_ID = 1
+
+
+def fake_message(author_id, channel_id, content):
+    return SimpleNamespace(
+        author=SimpleNamespace(id=author_id),
+        channel=SimpleNamespace(id=channel_id),
+        content=content,
+    )
+
+
+async def feed(bot, messages):
+    for message in messages:
+        await bot.on_message(message)
+
+
+def heap_growth(bot, messages):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    asyncio.run(feed(bot, messages))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    return sum(stat.size_diff for stat in stats)
+
+
+def legacy_growth(chatters):
+    # What the old last_activity dict cost for the same traffic
+    tracemalloc.start()
+    last_activity = {}
+    for author_id in range(chatters):
+        last_activity[author_id] = datetime.now(timezone.utc)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chatters", type=int, default=100_000)
+    parser.add_argument("--sessions", type=int, default=1_000)
+    parser.add_argument("--persona", default="Dominus")
+    args = parser.parse_args()
+
+    persona = load_persona(os.path.join(root_dir, args.persona))
+    bot = PersonaBot(persona, "unused", "unused", SessionStore().for_persona(persona.name), Scheduler())
+    bot.client._connection.user = SimpleNamespace(id=0)
+
+    owners = range(10**9, 10**9 + args.sessions)
+    for user_id in owners:
+        bot.sessions.open(user_id, user_id, [{"role": "system", "content": persona.system_prompt}])
+
+    # Warm up so one-off allocations (interned ints, dict resizes) don't count
+    heap_growth(bot, [fake_message(-i, LOBBY_CHANNEL_ID, "warmup") for i in range(1, 1000)])
+
+    chatter_msgs = [fake_message(i, LOBBY_CHANNEL_ID, "hello") for i in range(args.chatters)]
+    owner_msgs = [fake_message(user_id, LOBBY_CHANNEL_ID, "hello") for user_id in owners]
+
+    chatters = heap_growth(bot, chatter_msgs)
+    owners_growth = heap_growth(bot, owner_msgs)
+    legacy = legacy_growth(args.chatters)
+
+    print(f"persona:                {persona.name}")
+    print(f"active sessions:        {len(bot.sessions)}")
+    print(f"chatters:               {args.chatters}")
+    print(f"heap growth (chatters): {chatters / 1024:.1f} KiB ({chatters / args.chatters:.2f} B/chatter)")
+    print(f"heap growth (owners):   {owners_growth / 1024:.1f} KiB")
+    print(f"old last_activity dict: {legacy / 1024:.1f} KiB for the same chatters")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Microbenchmark for the SSE hot loop in stream_response.
+#
+#   python bench/sse_parser.py [--tokens 2000] [--rounds 20] [--stream FILE ...]
+#
+# Compares the old loop (text lines, json.loads per line, string +=, and
+# any(buffer.endswith(...)) per token) with botcore.sse (incremental byte
+# parser, orjson when installed, single-pass sentence splitting). Without
+# --stream it synthesises an OpenRouter-shaped reply cut into random network
+# chunks; --stream takes raw recorded SSE bytes (optionally .gz), or captures
+# from OPENROUTER_CAPTURE_DIR, which keep their original network chunking.
+# A directory is expanded to the captures inside it.
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+
+from botcore import sse
+from botcore.recording import find_recordings, is_recording, load_recording
+from botcore.sse import DONE, SSEParser, SentenceSplitter, delta_content
+
+WORDS = "the mind that does not flinch builds leverage through discipline and clear action every day".split()
+
+
+def synthetic_stream(tokens, seed=7):
+    rng = random.Random(seed)
+    events = [b": OPENROUTER PROCESSING\n\n"]
+    for i in range(tokens):
+        word = rng.choice(WORDS)
+        token = (" " if i else "") + word
+        roll = rng.random()
+        if roll < 0.06:
+            token += ". "
+        elif roll < 0.08:
+            token += "\n"
+        chunk = {
+            "id": "gen-1747000000-abcdefghijklmnop",
+            "provider": "Chutes",
+            "model": "qwen/qwen3-235b-a22b",
+            "object": "chat.completion.chunk",
+            "created": 1747000000,
+            "choices": [{"index": 0, "delta": {"role": "assistant", "content": token}, "finish_reason": None, "logprobs": None}],
+        }
+        events.append(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+    events.append(b"data: [DONE]\n\n")
+    raw = b"".join(events)
+
+    # Cut into network-sized pieces that ignore line boundaries
+    pieces, pos = [], 0
+    while pos < len(raw):
+        size = rng.randint(40, 1400)
+        pieces.append(raw[pos:pos + size])
+        pos += size
+    return pieces
+
+
+def load_stream(path):
+    if is_recording(path):
+        _, chunks = load_recording(path)
+        return [data for _, data in chunks]
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        raw = f.read()
+    return [raw[i:i + 1024] for i in range(0, len(raw), 1024)]
+
+
+def iter_lines(pieces):
+    # What httpx's aiter_lines() did before the parser ran
+    pending = ""
+    for piece in pieces:
+        text = pending + piece.decode("utf-8")
+        lines = text.splitlines(keepends=True)
+        pending = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            yield line.rstrip("\r\n")
+    if pending:
+        yield pending
+
+
+def old_loop(pieces):
+    buffer = ""
+    full_response = ""
+    segments = 0
+    for chunk in iter_lines(pieces):
+        if not chunk.strip() or chunk == "data: [DONE]":
+            continue
+        try:
+            data = json.loads(chunk[5:])
+            token = data["choices"][0]["delta"].get("content", "")
+            full_response += token
+            buffer += token
+            if any(buffer.endswith(p) for p in [". ", "! ", "? ", "\n"]):
+                segments += 1
+                buffer = ""
+        except (json.JSONDecodeError, KeyError):
+            continue
+    return full_response, segments
+
+
+def new_loop(pieces):
+    parser = SSEParser()
+    splitter = SentenceSplitter()
+    segments = 0
+    for piece in pieces:
+        done = False
+        for payload in parser.feed(piece):
+            if payload == DONE:
+                done = True
+                break
+            if splitter.feed(delta_content(payload)):
+                segments += 1
+        if done:
+            break
+    return splitter.text(), segments
+
+
+def timed(fn, pieces, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn(pieces)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--stream", nargs="*", default=[])
+    args = parser.parse_args()
+
+    streams = [(path, load_stream(path)) for path in find_recordings(args.stream)] or [
+        (f"synthetic ({args.tokens} tokens)", synthetic_stream(args.tokens))
+    ]
+    print(f"JSON decoder: {'orjson' if sse.orjson is not None else 'json'}")
+    for name, pieces in streams:
+        size = sum(len(p) for p in pieces)
+        old_time, (old_text, old_segments) = timed(old_loop, pieces, args.rounds)
+        new_time, (new_text, new_segments) = timed(new_loop, pieces, args.rounds)
+        assert old_text == new_text, "parsers disagree on the reply text"
+        print(f"{name}: {size / 1024:.0f} KiB, {old_segments} segments (old) / {new_segments} (new)")
+        print(f"  old loop: {old_time * 1000:8.2f} ms  {size / old_time / 2**20:7.1f} MiB/s")
+        print(f"  botcore:  {new_time * 1000:8.2f} ms  {size / new_time / 2**20:7.1f} MiB/s  ({old_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
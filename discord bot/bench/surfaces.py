@@ -0,0 +1,131 @@
+# Compares the session surfaces: private channels (cold, and with the
+# standby pool) against private threads, opening and closing sessions through
+# the real on_message against a fake Discord. No model calls are made.
+#
+#   python bench/surfaces.py [--sessions 40] [--ramp 10] [--persona Dominus]
+#                            [--discord-latency 0.05] [--pool-size 2]
+#                            [--create-limit 5] [--thread-limit 50]
+#                            [--guild-limit 500] [--category-limit 50]
+#                            [--existing 0] [--headroom 20]
+#
+# The rate limits are per 10 s. Discord does not publish its channel and
+# thread creation limits, so the defaults are only an assumption: channel
+# creation is limited per guild and much tighter than thread creation.
+# Close latency includes the one second close_session waits after posting
+# "Closing session...". --existing fills the guild with that many other
+# channels first; with a low --guild-limit, channel sessions queue for room
+# and are spread over categories of --category-limit channels.
+import argparse
+import asyncio
+import copy
+import os
+import random
+import sys
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+
+from fake_discord import FakeDiscord, FakeGuild, FakeMessage, FakeUser
+from load_test import percentile
+
+from botcore import capacity
+from botcore.host import load_persona
+from botcore.metrics import counter_value
+from botcore.persona import PersonaBot
+from botcore.scheduler import Scheduler
+from botcore.sessions import SessionStore
+
+
+async def run_backend(label, surface, pool_size, args):
+    os.environ["CHANNEL_POOL_SIZE"] = str(pool_size)
+    persona = copy.copy(load_persona(os.path.join(root_dir, args.persona)))
+    command, config = next(iter(persona.session_modes.items()))
+    persona.session_modes = {command: dict(config, surface=surface)}
+
+    limits = {"create_channel": (args.create_limit, 10.0), "create_thread": (args.thread_limit, 10.0)}
+    api = FakeDiscord(latency=args.discord_latency, limits=limits)
+    guild = FakeGuild(api)
+    lobby = guild.add_channel("lobby", config["allowed_channel_id"])
+    for i in range(args.existing):
+        guild.add_channel(f"existing-{i}")
+    capacity._capacities.clear()
+    scheduler = Scheduler()
+    scheduler.start()
+    bot = PersonaBot(persona, "fake-token", "fake-key", SessionStore().for_persona(persona.name), scheduler)
+    bot.client.get_channel = guild.get_channel
+    bot.prefill_channels()
+    await asyncio.gather(*bot.surfaces["channel"].pool.filling.values())
+
+    opens, closes = [], []
+    failed = 0
+    waits = counter_value("channel_capacity_waits", guild=guild.id)
+    timeouts = counter_value("channel_capacity_timeouts", guild=guild.id)
+    peak_channels = len(guild.channels)
+    rng = random.Random(args.seed)
+
+    async def session(user_id):
+        nonlocal peak_channels, failed
+        user = FakeUser(api, user_id)
+        await asyncio.sleep(rng.uniform(0, args.ramp))
+        started = time.perf_counter()
+        await bot.on_message(FakeMessage(lobby, user, command))
+        opens.append(time.perf_counter() - started)
+        peak_channels = max(peak_channels, len(guild.channels))
+        channel_id = bot.sessions.channel_of(user_id)
+        if channel_id is None:
+            failed += 1
+            return
+        channel = guild.get_channel(channel_id)
+        await asyncio.sleep(rng.uniform(0, args.hold))
+        started = time.perf_counter()
+        await bot.on_message(FakeMessage(channel, user, "!close"))
+        closes.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(session(1000 + i) for i in range(args.sessions)))
+    await scheduler.stop()
+
+    print(f"{label}")
+    print(f"  open latency     p50 {percentile(opens, 0.5):.2f} s   p99 {percentile(opens, 0.99):.2f} s")
+    print(f"  close latency    p50 {percentile(closes, 0.5):.2f} s   p99 {percentile(closes, 0.99):.2f} s")
+    print(
+        f"  guild channels   {peak_channels} at peak of {args.guild_limit}, {len(guild.channels)} left, "
+        f"{len(guild.categories)} categories"
+    )
+    print(
+        f"  admission        {counter_value('channel_capacity_waits', guild=guild.id) - waits} waited, "
+        f"{counter_value('channel_capacity_timeouts', guild=guild.id) - timeouts} timed out, {failed} not opened"
+    )
+    print(f"  rate limited     {sum(api.rate_limited.values())} calls  {dict(api.rate_limited)}")
+    print(f"  discord calls    {dict(api.calls)}")
+
+
+async def run(args):
+    capacity.GUILD_CHANNEL_LIMIT = args.guild_limit
+    capacity.CATEGORY_CHANNEL_LIMIT = args.category_limit
+    os.environ["GUILD_CHANNEL_HEADROOM"] = str(args.headroom)
+    await run_backend("channel", "channel", 0, args)
+    await run_backend(f"channel + {args.pool_size} standby", "channel", args.pool_size, args)
+    await run_backend("thread", "thread", 0, args)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--ramp", type=float, default=10.0, help="seconds over which sessions open")
+    parser.add_argument("--hold", type=float, default=5.0, help="max seconds a session stays open")
+    parser.add_argument("--persona", default="Dominus")
+    parser.add_argument("--discord-latency", type=float, default=0.05)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--create-limit", type=int, default=5, help="channel creates per 10 s")
+    parser.add_argument("--thread-limit", type=int, default=50, help="thread creates per 10 s")
+    parser.add_argument("--guild-limit", type=int, default=500)
+    parser.add_argument("--category-limit", type=int, default=50)
+    parser.add_argument("--existing", type=int, default=0, help="other channels already in the guild")
+    parser.add_argument("--headroom", type=int, default=20, help="GUILD_CHANNEL_HEADROOM")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
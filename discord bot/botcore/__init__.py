@@ -0,0 +1 @@
+# Shared runtime used by every persona bot (Dominus, Lux, Seraph, Stratos, Vitalis, Vox)
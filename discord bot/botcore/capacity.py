@@ -0,0 +1,174 @@
+import asyncio
+import collections
+import os
+import time
+from contextlib import asynccontextmanager
+
+import discord
+
+from botcore.metrics import incr
+
+# Discord's hard caps: 500 channels per guild (categories included, threads
+# not) and 50 channels per category
+GUILD_CHANNEL_LIMIT = 500
+CATEGORY_CHANNEL_LIMIT = 50
+CATEGORY_NAME = "{persona} sessions"  # Then "... 2", "... 3" as they fill up
+RECHECK_INTERVAL = 5.0  # Seconds between room checks while waiting, for deletions made by others
+
+_capacities = {}  # {guild_id: GuildCapacity}
+
+
+class CapacityTimeout(Exception):
+    pass
+
+
+class GuildCapacity:
+    # Admission control for session channels in one guild, shared by every
+    # persona in the process. The live count is the guild's own channel list,
+    # which discord.py keeps current from gateway events, so channels made by
+    # other bots and by people are counted too. `headroom` channels are left
+    # free for the server's own use; once a session would eat into them it
+    # waits, first come first served, until a channel is deleted.
+    def __init__(self, limit, headroom, timeout):
+        self.limit = limit
+        self.headroom = headroom
+        self.timeout = timeout  # Seconds a session waits for room before giving up
+        self.creating = 0  # Admitted creates not yet in the guild's channel list
+        self.pending = collections.Counter()  # {category_id: admitted creates}
+        self.pools = set()  # Standby channel pools holding places in this guild
+        self._released = set()  # Standby channels deleted but maybe still listed
+        self._waiters = collections.deque()
+        self._changed = asyncio.Event()
+        self._category_lock = asyncio.Lock()
+
+    def room(self, guild):
+        # A deleted channel leaves guild.channels only once the gateway says
+        # so; count it as gone already
+        self._released = {c for c in self._released if guild.get_channel(c) is not None}
+        return self.limit - self.headroom - len(guild.channels) - self.creating + len(self._released)
+
+    def has_room(self, guild):
+        # Two places: the channel and possibly a new category for it
+        return self.room(guild) >= 2
+
+    @property
+    def waiting(self):
+        return len(self._waiters)
+
+    def notify(self):
+        # Something was deleted or a create finished: waiters look again
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    @asynccontextmanager
+    async def admit(self, guild, persona_name, on_wait=None, timeout=None):
+        # Hold room for one new channel for the body of the with block, which
+        # creates it in the category yielded (None if no category could be
+        # made). Raises CapacityTimeout after `timeout` seconds of waiting;
+        # on_wait(position) is awaited whenever the place in line changes.
+        if self._waiters or not self.has_room(guild):
+            await self._wait(guild, on_wait, self.timeout if timeout is None else timeout)
+        self.creating += 1
+        category = None
+        try:
+            category = await self.category_for(guild, CATEGORY_NAME.format(persona=persona_name))
+            yield category
+        finally:
+            if category is not None:
+                self.pending[category.id] -= 1
+                if not self.pending[category.id]:
+                    del self.pending[category.id]
+            self.creating -= 1
+            self.notify()
+
+    async def _wait(self, guild, on_wait, timeout):
+        ticket = object()
+        self._waiters.append(ticket)
+        incr("channel_capacity_waits", guild=guild.id)
+        deadline = time.monotonic() + timeout
+        shown = None
+        try:
+            while not (self._waiters[0] is ticket and self.has_room(guild)):
+                changed = self._changed
+                if timeout and not self.has_room(guild):
+                    # Only sessions that wait reclaim; a refill just gives up
+                    await self.reclaim(guild)
+                    if self._waiters[0] is ticket and self.has_room(guild):
+                        break
+                if on_wait is not None:
+                    position = self._waiters.index(ticket) + 1
+                    if position != shown:
+                        shown = position
+                        await on_wait(position)
+                        continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    incr("channel_capacity_timeouts", guild=guild.id)
+                    raise CapacityTimeout(f"guild {guild.id} has no room for another channel")
+                try:
+                    await asyncio.wait_for(changed.wait(), min(RECHECK_INTERVAL, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.remove(ticket)
+            self.notify()  # The next in line may go now
+
+    async def reclaim(self, guild):
+        # Standby channels hold places only their own persona and mode can
+        # use; while sessions wait for room, give one back per waiter
+        wanted = len(self._waiters) - len(self._released)
+        released = 0
+        for pool in list(self.pools):
+            while wanted > 0:
+                channel = pool.release(guild)
+                if channel is None:
+                    break
+                wanted -= 1
+                self._released.add(channel.id)
+                try:
+                    await channel.delete(reason="Room for a waiting session")
+                    incr("discord_channels_deleted", persona=pool.persona_name)
+                    released += 1
+                except discord.NotFound:
+                    released += 1
+                except discord.HTTPException as e:
+                    self._released.discard(channel.id)
+                    incr("discord_channel_errors", persona=pool.persona_name, action="release", status=e.status)
+                    print(f"Standby channel release failed: {e}")
+        if released:
+            self.notify()
+
+    async def category_for(self, guild, name):
+        # The first category of the series with a free place, creating the
+        # next one when they are all full. The place is counted as taken
+        # until admit() ends.
+        async with self._category_lock:
+            categories = {category.name: category for category in guild.categories}
+            index = 1
+            while True:
+                label = name if index == 1 else f"{name} {index}"
+                category = categories.get(label)
+                if category is None:
+                    try:
+                        category = await guild.create_category(label, reason="Session channels")
+                        incr("discord_categories_created", guild=guild.id)
+                    except discord.HTTPException as e:
+                        incr("discord_channel_errors", action="create_category", status=e.status)
+                        print(f"Category creation failed: {e}")
+                        return None  # An uncategorised channel beats no session
+                if len(category.channels) + self.pending[category.id] < CATEGORY_CHANNEL_LIMIT:
+                    self.pending[category.id] += 1
+                    return category
+                index += 1
+
+
+def guild_capacity(guild):
+    # Configured on first use so each bot's .env is already loaded
+    capacity = _capacities.get(guild.id)
+    if capacity is None:
+        capacity = _capacities[guild.id] = GuildCapacity(
+            GUILD_CHANNEL_LIMIT,
+            int(os.getenv("GUILD_CHANNEL_HEADROOM", "20")),
+            float(os.getenv("CHANNEL_WAIT_TIMEOUT", "600")),
+        )
+    return capacity
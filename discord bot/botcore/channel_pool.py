@@ -0,0 +1,114 @@
+import os
+from collections import deque
+
+import discord
+
+from botcore.capacity import CapacityTimeout, guild_capacity
+from botcore.metrics import incr, set_gauge
+
+# Hidden, pre-created session channels. Opening a session then costs one
+# channel edit (name, topic and overwrites in a single PATCH) instead of a
+# channel create plus a slowmode edit, and the guild's tight channel-create
+# rate limit is paid in the background. Channels are never reused: a closed
+# session's channel is deleted as before and a fresh one takes its place.
+# Standby channels count against the guild's channel cap, so the pool only
+# grows while the guild has room and no session is waiting for it, and gives
+# channels back when sessions are waiting.
+#
+# CHANNEL_POOL_SIZE is the number of standby channels per persona, guild and
+# slowmode; 0 turns the pool off.
+DEFAULT_POOL_SIZE = 2
+
+
+def pool_size():
+    return int(os.getenv("CHANNEL_POOL_SIZE", str(DEFAULT_POOL_SIZE)))
+
+
+class ChannelPool:
+    def __init__(self, persona_name, scheduler):
+        self.persona_name = persona_name
+        self.scheduler = scheduler
+        self.ready = {}  # (guild_id, slowmode) -> deque of standby channels
+        self.filling = {}  # (guild_id, slowmode) -> refill task
+        self.adopted = set()  # Keys whose leftovers from a previous run were picked up
+        self.cold_creates = 0  # Sessions creating their own channel because the pool ran dry
+
+    def standby_topic(self, slowmode):
+        # Marks standby channels so the next run adopts them instead of leaking them
+        return f"{self.persona_name} standby channel (slowmode {slowmode}s)"
+
+    def standby_name(self):
+        return f"{self.persona_name.lower()}-standby"
+
+    def take(self, guild, slowmode):
+        # A standby channel for this guild and slowmode, or None
+        key = (guild.id, slowmode)
+        ready = self.ready.get(key)
+        channel = None
+        while ready:
+            candidate = ready.popleft()
+            if guild.get_channel(candidate.id) is not None:  # Not deleted by hand meanwhile
+                channel = candidate
+                break
+        incr("channel_pool_hits" if channel else "channel_pool_misses", persona=self.persona_name)
+        self.report(guild, slowmode)
+        self.refill(guild, slowmode)
+        return channel
+
+    def release(self, guild):
+        # Hand one standby channel in this guild over for deletion, or None
+        for (guild_id, slowmode), ready in self.ready.items():
+            if guild_id == guild.id and ready:
+                channel = ready.pop()
+                incr("channel_pool_released", persona=self.persona_name)
+                self.report(guild, slowmode)
+                return channel
+        return None
+
+    def refill(self, guild, slowmode):
+        key = (guild.id, slowmode)
+        task = self.filling.get(key)
+        if pool_size() > 0 and (task is None or task.done()):
+            self.filling[key] = self.scheduler.spawn(self.fill(guild, slowmode))
+
+    async def fill(self, guild, slowmode):
+        key = (guild.id, slowmode)
+        ready = self.ready.setdefault(key, deque())
+        topic = self.standby_topic(slowmode)
+        if key not in self.adopted:
+            self.adopted.add(key)
+            ready.extend(c for c in guild.text_channels if c.topic == topic and c not in ready)
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+        }
+        # Creates share one guild-wide rate limit; a user waiting on a cold
+        # create goes first, and the next take() resumes the refill
+        capacity = guild_capacity(guild)
+        capacity.pools.add(self)
+        while len(ready) < pool_size() and not self.cold_creates:
+            if capacity.waiting or not capacity.has_room(guild):
+                break
+            try:
+                async with capacity.admit(guild, self.persona_name, timeout=0) as category:
+                    channel = await guild.create_text_channel(
+                        self.standby_name(),
+                        overwrites=overwrites,
+                        topic=topic,
+                        slowmode_delay=slowmode,
+                        category=category,
+                        reason=f"{self.persona_name} standby channel"
+                    )
+            except CapacityTimeout:
+                break
+            except discord.HTTPException as e:
+                incr("discord_channel_errors", persona=self.persona_name, action="prefill", status=e.status)
+                print(f"Standby channel creation failed: {e}")
+                break
+            incr("discord_channels_created", persona=self.persona_name)
+            ready.append(channel)
+        self.report(guild, slowmode)
+
+    def report(self, guild, slowmode):
+        ready = self.ready.get((guild.id, slowmode), ())
+        set_gauge("channel_pool_ready", len(ready), persona=self.persona_name, guild=guild.id, slowmode=slowmode)
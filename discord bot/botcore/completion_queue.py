@@ -0,0 +1,132 @@
+import asyncio
+import collections
+import os
+import time
+from contextlib import asynccontextmanager
+
+# Lanes from highest to lowest priority. Personas pick a lane per session
+# mode with the "lane" key in SESSION_MODES; summaries run in "background".
+LANES = ("paid", "standard", "free", "background")
+DEFAULT_LANE = "standard"
+
+STARVATION_LIMIT = 60.0  # Seconds a waiter can be passed over before it goes first
+POSITION_INTERVAL = 2.0  # Seconds between queue position checks for a waiting turn
+
+_completion_queue = None
+
+
+class _Waiter:
+    __slots__ = ("lane", "future", "since")
+
+    def __init__(self, lane, future):
+        self.lane = lane
+        self.future = future
+        self.since = time.monotonic()
+
+
+class CompletionQueue:
+    # Admission control in front of OpenRouter, shared by every persona in the
+    # process. At most `limit` completions stream at once; the rest wait in
+    # their lane and are started highest lane first, oldest first within a
+    # lane. `reserved` slots can only be taken by the paid lane, so a burst of
+    # free traffic never makes a paid turn wait for a whole reply to finish.
+    def __init__(self, limit, reserved=0):
+        self.limit = max(limit, 1)
+        self.reserved = max(min(reserved, self.limit - 1), 0)
+        self.in_flight = 0
+        self._lanes = {lane: collections.deque() for lane in LANES}
+
+    def depth(self, lane=None):
+        if lane is not None:
+            return len(self._lanes[lane])
+        return sum(len(queue) for queue in self._lanes.values())
+
+    def position(self, waiter):
+        # 1-based place in line: everything in higher lanes goes first
+        ahead = 0
+        for lane, queue in self._lanes.items():
+            if lane == waiter.lane:
+                return ahead + queue.index(waiter) + 1
+            ahead += len(queue)
+        return ahead + 1
+
+    @asynccontextmanager
+    async def slot(self, lane=DEFAULT_LANE, on_wait=None):
+        # Hold one completion slot for the body of the with block. If the turn
+        # has to queue, on_wait(position) is awaited whenever its place in
+        # line changes.
+        if lane not in self._lanes:
+            lane = DEFAULT_LANE
+        if self._can_start(lane) and not self._queued_before(lane):
+            self.in_flight += 1
+        else:
+            await self._wait(lane, on_wait)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._grant()
+
+    def _can_start(self, lane):
+        capacity = self.limit if lane == "paid" else self.limit - self.reserved
+        return self.in_flight < capacity
+
+    def _queued_before(self, lane):
+        # Waiters in this lane or a higher one keep their turn
+        for name, queue in self._lanes.items():
+            if queue:
+                return True
+            if name == lane:
+                return False
+        return False
+
+    async def _wait(self, lane, on_wait):
+        waiter = _Waiter(lane, asyncio.get_running_loop().create_future())
+        self._lanes[lane].append(waiter)
+        shown = None
+        try:
+            while not waiter.future.done():
+                if on_wait is not None:
+                    position = self.position(waiter)
+                    if position != shown:
+                        shown = position
+                        await on_wait(position)
+                        continue
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(waiter.future), POSITION_INTERVAL if on_wait is not None else None
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            if waiter.future.done():
+                # Granted just as the turn was cancelled: pass the slot on
+                self.in_flight -= 1
+                self._grant()
+            else:
+                self._lanes[lane].remove(waiter)
+                waiter.future.cancel()
+            raise
+
+    def _grant(self):
+        while True:
+            now = time.monotonic()
+            heads = [queue[0] for queue in self._lanes.values() if queue and self._can_start(queue[0].lane)]
+            if not heads:
+                return
+            starved = [waiter for waiter in heads if now - waiter.since >= STARVATION_LIMIT]
+            waiter = min(starved, key=lambda w: w.since) if starved else heads[0]
+            self._lanes[waiter.lane].popleft()
+            self.in_flight += 1
+            waiter.future.set_result(None)
+
+
+def get_completion_queue():
+    # Sized on first use so each bot's .env is already loaded
+    global _completion_queue
+    if _completion_queue is None:
+        _completion_queue = CompletionQueue(
+            int(os.getenv("LLM_MAX_IN_FLIGHT", "8")),
+            int(os.getenv("LLM_PAID_RESERVED", "2")),
+        )
+    return _completion_queue
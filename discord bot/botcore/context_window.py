@@ -0,0 +1,81 @@
+import os
+
+from botcore.openrouter import complete
+from botcore.tokens import message_tokens
+
+DEFAULT_BUDGET = 8000  # Prompt tokens per request unless a persona sets its own
+KEEP_RECENT = 2  # Most recent messages always sent, even over budget
+
+# Rolling summary of turns that no longer fit
+DEFAULT_SUMMARY_MODEL = "qwen/qwen3-8b"  # OPENROUTER_SUMMARY_MODEL overrides it
+SUMMARY_HEADROOM = 0.75  # Start folding turns once the window passes this share of the budget
+SUMMARY_MAX_TOKENS = 600
+SUMMARY_PREFIX = "Summary of the earlier part of this conversation:\n"
+SUMMARY_INSTRUCTIONS = (
+    "You maintain the running memory of a coaching conversation. Merge the existing summary "
+    "and the new transcript into one updated summary of at most 250 words. Keep every fact the "
+    "user stated about themselves, their answers to diagnostic questions, their goals and numbers, "
+    "and every mission, challenge or plan the coach assigned. Drop greetings and filler. "
+    "Write plain prose in the third person. Output only the summary."
+)
+
+
+def fit_to_budget(messages, budget=DEFAULT_BUDGET, keep_recent=KEEP_RECENT):
+    # Returns (window, dropped, saved_tokens). The window keeps the leading
+    # system messages (prompt and running summary), the last keep_recent
+    # messages, and as many older turns as fit in the budget, newest first.
+    # dropped lists the older turns left out, oldest first, and saved_tokens
+    # is their estimated size.
+    if not messages:
+        return [], [], 0
+
+    head_len = 0
+    while head_len < len(messages) and messages[head_len]["role"] == "system":
+        head_len += 1
+    head = messages[:head_len]
+    body = messages[len(head):]
+    recent = body[-keep_recent:] if keep_recent else []
+    older = body[:len(body) - len(recent)]
+
+    used = sum(message_tokens(m) for m in head) + sum(message_tokens(m) for m in recent)
+    keep_from = len(older)
+    for i in range(len(older) - 1, -1, -1):
+        cost = message_tokens(older[i])
+        if used + cost > budget:
+            break
+        used += cost
+        keep_from = i
+
+    dropped = older[:keep_from]
+    saved = sum(message_tokens(m) for m in dropped)
+    return head + older[keep_from:] + recent, dropped, saved
+
+
+def with_summary(system_message, summary, turns):
+    # The request context: system prompt, running summary (if any), then the
+    # turns that have not been folded into it yet
+    messages = [system_message]
+    if summary:
+        messages.append({"role": "system", "content": SUMMARY_PREFIX + summary})
+    messages.extend(turns)
+    return messages
+
+
+def summary_model():
+    # Read on use so each bot's .env is already loaded
+    return os.getenv("OPENROUTER_SUMMARY_MODEL", DEFAULT_SUMMARY_MODEL)
+
+
+async def summarize(previous_summary, turns, *, api_key, title):
+    transcript = "\n".join(f"{m['role'].upper()}: {m['content']}" for m in turns)
+    prompt = f"Existing summary:\n{previous_summary or '(none)'}\n\nNew transcript:\n{transcript}"
+    return await complete(
+        [
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": prompt},
+        ],
+        api_key=api_key,
+        model=summary_model(),
+        title=f"{title} summary",
+        max_tokens=SUMMARY_MAX_TOKENS,
+    )
@@ -0,0 +1,428 @@
+import asyncio
+import re
+import time
+
+SEND_QUEUE_SIZE = 64  # Segments buffered ahead of Discord before the reader waits
+MESSAGE_LIMIT = 2000  # Discord's hard cap on message length
+FLUSH_INTERVAL = 1.5  # Seconds a partial message may wait for more text
+EDIT_INTERVAL = 1.0  # Minimum seconds between edits of a streaming message
+
+# Discord's per-channel message bucket (5 messages per 5 seconds). discord.py
+# keeps the X-RateLimit headers to itself, so the sender tracks the same
+# budget locally and waits for it instead of running into 429s.
+CHANNEL_RATE_LIMIT = 5
+CHANNEL_RATE_PERIOD = 5.0
+
+MARKDOWN_TOKEN = re.compile(r"```|\*\*")
+
+
+class RateBudget:
+    # Token bucket mirroring one channel's send limit
+    def __init__(self, capacity=CHANNEL_RATE_LIMIT, period=CHANNEL_RATE_PERIOD):
+        self.capacity = capacity
+        self.period = period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / self.period)
+        self.updated = now
+
+    def wait_time(self):
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.period / self.capacity
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    def idle(self):
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+_channel_budgets = {}  # {channel_id: RateBudget}
+
+
+def channel_budget(key):
+    # key is a channel id for sends, or ("edit", channel_id) for edits
+    budget = _channel_budgets.get(key)
+    if budget is None:
+        # Forget channels whose bucket has fully refilled
+        for idle in [k for k, b in _channel_budgets.items() if b.idle()]:
+            del _channel_budgets[idle]
+        budget = _channel_budgets[key] = RateBudget()
+    return budget
+
+
+def markdown_state(text):
+    # (in_code_block, code_language, in_bold) at the end of text
+    in_code, lang, in_bold = False, "", False
+    for match in MARKDOWN_TOKEN.finditer(text):
+        if match.group() == "```":
+            in_code = not in_code
+            if in_code:
+                end = text.find("\n", match.end())
+                lang = text[match.end():end if end != -1 else len(text)].strip()
+        elif not in_code:
+            in_bold = not in_bold
+    return in_code, lang, in_bold
+
+
+def split_message(text, safe_cuts, limit=MESSAGE_LIMIT):
+    # Cut one Discord message off the front of text. Prefer the last offset in
+    # safe_cuts (where no code block or bold span is open) that fits; a single
+    # span longer than the limit is split on a line break and its markdown is
+    # closed here and reopened in the remainder.
+    fitting = [cut for cut in safe_cuts if 0 < cut and len(text[:cut].strip()) <= limit]
+    if fitting:
+        cut = fitting[-1]
+        return text[:cut], text[cut:], True
+
+    room = limit - 8  # Space for the closing ``` or **
+    cut = text.rfind("\n", 0, room)
+    if cut <= 0:
+        cut = room
+    head, tail = text[:cut], text[cut:].lstrip("\n")
+    in_code, lang, in_bold = markdown_state(head)
+    if in_code:
+        head += "\n```"
+        tail = f"```{lang}\n{tail}"
+    elif in_bold:
+        head += "**"
+        tail = "**" + tail
+    return head, tail, False
+
+
+class ChannelSender:
+    # Delivers a streamed reply to a channel from its own task, so reading the
+    # model stream never waits on a Discord round-trip or rate limit. The
+    # queue is bounded: if Discord falls far behind, the reader pauses instead
+    # of buffering without limit.
+    #
+    # The first segment is posted as soon as it is complete and the channel's
+    # send budget allows. Later segments are coalesced: text is held until
+    # FLUSH_INTERVAL has passed and the budget allows a message, then
+    # everything gathered is posted as one message of up to MESSAGE_LIMIT
+    # characters, cut only where no code block or bold span is open.
+    def __init__(self, channel, maxsize=SEND_QUEUE_SIZE):
+        self.channel = channel
+        self.sent = 0
+        self.edits = 0  # Never edits; kept so both senders report the same counters
+        self.send_latency = 0.0  # Seconds spent waiting on Discord for sends
+        self.delivered = []  # Content of every message posted
+        self._queue = asyncio.Queue(maxsize)
+        self._task = None
+        self._error = None
+        self._budget = channel_budget(getattr(channel, "id", None))
+        self._pending = ""
+        self._safe_cuts = []  # Offsets into _pending where markdown is balanced
+        self._pending_since = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def put(self, text):
+        if text:
+            await self._queue.put(text)
+
+    async def close(self):
+        # Wait for everything queued to be delivered, then surface the first
+        # send failure, if any
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        if self._error is not None:
+            raise self._error
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def abort(self, timeout):
+        # The reply was stopped: post what is already queued, for at most
+        # timeout seconds, then drop the rest
+        try:
+            await asyncio.wait_for(self.close(), timeout)
+        except Exception:
+            pass
+        finally:
+            self.cancel()
+
+    def delivered_text(self):
+        # What the channel actually shows of the reply
+        return "\n".join(self.delivered)
+
+    async def _run(self):
+        while True:
+            try:
+                text = await asyncio.wait_for(self._queue.get(), self._flush_delay())
+            except asyncio.TimeoutError:
+                await self._flush()
+                continue
+            if text is None:
+                await self._flush(final=True)
+                return
+            self._append(text)
+            while len(self._pending.strip()) > MESSAGE_LIMIT:
+                await self._send_one()
+
+    def _append(self, text):
+        if self._pending_since is None:
+            self._pending_since = time.monotonic()
+        self._pending += text
+        in_code, _, in_bold = markdown_state(self._pending)
+        if not in_code and not in_bold:
+            self._safe_cuts.append(len(self._pending))
+
+    def _flush_delay(self):
+        if not self._pending.strip() or not self._safe_cuts:
+            return None
+        if not self.sent and self._error is None:
+            return self._budget.wait_time()  # Nothing shown yet: don't keep the user waiting
+        held = time.monotonic() - self._pending_since
+        return max(FLUSH_INTERVAL - held, self._budget.wait_time(), 0)
+
+    async def _flush(self, final=False):
+        if final:
+            while self._pending.strip():
+                await self._send_one(final=True)
+            return
+        if self._safe_cuts:
+            cut = self._safe_cuts[-1]
+            if len(self._pending[:cut].strip()) <= MESSAGE_LIMIT:
+                await self._deliver(self._pending[:cut])
+                self._advance(cut)
+                return
+            await self._send_one()
+
+    async def _send_one(self, final=False):
+        cuts = self._safe_cuts + ([len(self._pending)] if final else [])
+        head, tail, clean = split_message(self._pending, cuts)
+        await self._deliver(head)
+        if clean:
+            self._advance(len(head))
+        else:
+            self._pending = tail
+            self._safe_cuts = []
+            in_code, _, in_bold = markdown_state(tail)
+            if not in_code and not in_bold:
+                self._safe_cuts.append(len(tail))
+            self._pending_since = time.monotonic() if tail.strip() else None
+
+    def _advance(self, cut):
+        self._pending = self._pending[cut:]
+        self._safe_cuts = [c - cut for c in self._safe_cuts if c > cut]
+        self._pending_since = time.monotonic() if self._pending.strip() else None
+
+    async def _deliver(self, text):
+        text = text.strip()
+        if not text or self._error is not None:
+            return  # After a failure keep draining so the reader never blocks
+        delay = self._budget.wait_time()
+        if delay:
+            await asyncio.sleep(delay)
+        self._budget.take()
+        started = time.monotonic()
+        try:
+            await self.channel.send(text)
+            self.sent += 1
+            self.delivered.append(text)
+        except Exception as e:
+            self._error = e
+        self.send_latency += time.monotonic() - started
+
+
+class QueueNotice:
+    # "You're #N in line" message for a turn waiting on a completion slot.
+    # Posted on the first update, edited as the position changes and deleted
+    # once the reply starts. Failures are ignored: it is only a courtesy.
+    # `template` is formatted with position and name.
+    def __init__(self, channel, name, template=None):
+        self.channel = channel
+        self.name = name
+        self.template = template or "⏳ You're #{position} in line. {name} will answer as soon as a slot frees up."
+        self._message = None
+
+    async def update(self, position):
+        text = self.template.format(position=position, name=self.name)
+        try:
+            if self._message is None:
+                self._message = await self.channel.send(text)
+            else:
+                await self._message.edit(content=text)
+        except Exception:
+            pass
+
+    async def clear(self):
+        if self._message is not None:
+            try:
+                await self._message.delete()
+            except Exception:
+                pass
+            self._message = None
+
+
+class EditingSender:
+    # Streams a reply into one message: posts a placeholder, then edits it as
+    # text arrives, no more often than EDIT_INTERVAL and the channel's edit
+    # budget allow. A new message is started only when the current one would
+    # pass MESSAGE_LIMIT. Same interface as ChannelSender.
+    def __init__(self, channel, placeholder=None, maxsize=SEND_QUEUE_SIZE):
+        self.channel = channel
+        self.placeholder = placeholder or "…"
+        self.sent = 0
+        self.edits = 0
+        self.send_latency = 0.0  # Seconds spent waiting on Discord for sends and edits
+        self.delivered = []  # Final content of every finished message
+        self._queue = asyncio.Queue(maxsize)
+        self._task = None
+        self._error = None
+        self._send_budget = channel_budget(getattr(channel, "id", None))
+        self._edit_budget = channel_budget(("edit", getattr(channel, "id", None)))
+        self._message = None
+        self._text = ""  # Content of the current message so far
+        self._shown = None  # What Discord currently displays for it
+        self._safe_cuts = []
+        self._last_edit = 0.0
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def put(self, text):
+        if text:
+            await self._queue.put(text)
+
+    async def close(self):
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        if self._error is not None:
+            raise self._error
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def abort(self, timeout):
+        # The reply was stopped: show what is already queued, for at most
+        # timeout seconds, then drop the rest. A placeholder that never got
+        # any text is deleted rather than left "thinking" forever.
+        try:
+            await asyncio.wait_for(self.close(), timeout)
+        except Exception:
+            pass
+        finally:
+            self.cancel()
+        if self._message is not None and self._shown is None:
+            try:
+                await asyncio.wait_for(self._message.delete(), timeout)
+            except Exception:
+                pass
+            self._message = None
+
+    def delivered_text(self):
+        # What the channel actually shows of the reply
+        return "\n".join(self.delivered + ([self._shown] if self._shown else []))
+
+    async def _run(self):
+        await self._post(self.placeholder)
+        while True:
+            try:
+                text = await asyncio.wait_for(self._queue.get(), self._edit_delay())
+            except asyncio.TimeoutError:
+                await self._edit()
+                continue
+            if text is None:
+                await self._finish()
+                return
+            self._text += text
+            in_code, _, in_bold = markdown_state(self._text)
+            if not in_code and not in_bold:
+                self._safe_cuts.append(len(self._text))
+            while len(self._text.strip()) > MESSAGE_LIMIT:
+                await self._rollover()
+
+    def _edit_delay(self):
+        if self._text.strip() == (self._shown or "") or not self._text.strip():
+            return None
+        since = time.monotonic() - self._last_edit
+        return max(EDIT_INTERVAL - since, self._edit_budget.wait_time(), 0)
+
+    async def _rollover(self):
+        # Finish the current message at a safe cut and carry the rest over
+        head, tail, clean = split_message(self._text, self._safe_cuts)
+        await self._edit(head)
+        if self._shown:
+            self.delivered.append(self._shown)
+        cut = len(head)
+        self._text = tail
+        if clean:
+            self._safe_cuts = [c - cut for c in self._safe_cuts if c > cut]
+        else:
+            in_code, _, in_bold = markdown_state(tail)
+            self._safe_cuts = [] if in_code or in_bold else [len(tail)]
+        self._message = None
+        self._shown = None
+
+    async def _finish(self):
+        while len(self._text.strip()) > MESSAGE_LIMIT:
+            await self._rollover()
+        if self._text.strip():
+            await self._edit()
+        elif self._message is not None and self._shown is None and self._error is None:
+            # Nothing was generated: drop the placeholder
+            try:
+                await self._message.delete()
+                self._message = None
+            except Exception as e:
+                self._error = e
+
+    async def _post(self, text):
+        if self._error is not None:
+            return
+        delay = self._send_budget.wait_time()
+        if delay:
+            await asyncio.sleep(delay)
+        self._send_budget.take()
+        started = time.monotonic()
+        try:
+            self._message = await self.channel.send(text)
+            self.sent += 1
+        except Exception as e:
+            self._error = e
+        self.send_latency += time.monotonic() - started
+
+    async def _edit(self, text=None):
+        text = (self._text if text is None else text).strip()
+        if not text or text == self._shown or self._error is not None:
+            return
+        if self._message is None:
+            await self._post(text)
+            self._shown = text
+            self._last_edit = time.monotonic()
+            return
+        delay = self._edit_budget.wait_time()
+        if delay:
+            await asyncio.sleep(delay)
+        self._edit_budget.take()
+        started = time.monotonic()
+        try:
+            await self._message.edit(content=text)
+            self.edits += 1
+            self._shown = text
+            self._last_edit = time.monotonic()
+        except Exception as e:
+            self._error = e
+        self.send_latency += time.monotonic() - started
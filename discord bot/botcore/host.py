@@ -0,0 +1,152 @@
+import asyncio
+import importlib.util
+import os
+
+import discord
+from dotenv import dotenv_values, load_dotenv
+
+from botcore.completion_queue import LANES, get_completion_queue
+from botcore.metrics import format_summary, register_collector, set_gauge
+from botcore.metrics_server import install_process_metrics, start_metrics_server
+from botcore.openrouter import close_http_client
+from botcore.persona import PersonaBot
+from botcore.scheduler import Scheduler
+from botcore.session_db import SessionDB
+from botcore.sessions import SessionStore
+from botcore.signals import install_signal_handlers
+from botcore.tokens import message_tokens
+
+SESSION_DB_NAME = "memory.db"
+
+
+def load_persona(bot_dir):
+    # Import <bot_dir>/main.py under a unique module name and return its PERSONA
+    folder = os.path.basename(os.path.normpath(bot_dir))
+    spec = importlib.util.spec_from_file_location(f"persona_{folder.lower()}", os.path.join(bot_dir, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.PERSONA
+
+
+async def run_bot(bot):
+    try:
+        await bot.start()
+    except discord.LoginFailure:
+        print(f"❌ Invalid Discord token for {bot.persona.name}")
+    except Exception as e:
+        print(f"❌ Fatal error in {bot.persona.name}: {type(e).__name__}: {e}")
+
+
+async def log_metrics():
+    text = format_summary()
+    if text:
+        print(f"📊 Latency summary\n{text}")
+
+
+def collect_sessions(store):
+    # Gauges read from live state at scrape time
+    def collect():
+        for registry in store:
+            active = list(registry)
+            sizes = [sum(message_tokens(m) for m in session.context) for session in active]
+            set_gauge("sessions_active", len(active), persona=registry.name)
+            set_gauge("sessions_dormant", len(registry) - len(active), persona=registry.name)
+            set_gauge("session_context_tokens_sum", sum(sizes), persona=registry.name)
+            set_gauge("session_context_tokens_max", max(sizes, default=0), persona=registry.name)
+        completions = get_completion_queue()
+        set_gauge("llm_slots_in_use", completions.in_flight)
+        for lane in LANES:
+            set_gauge("llm_queue_depth", completions.depth(lane), lane=lane)
+    return collect
+
+
+async def serve(bots, scheduler, store, stop_event=None):
+    await store.start()
+    # Seconds between latency summaries in the log; 0 turns them off
+    metrics_interval = float(os.getenv("METRICS_LOG_INTERVAL", "600"))
+    if metrics_interval > 0:
+        scheduler.every(metrics_interval, log_metrics)
+    install_process_metrics(scheduler)
+    register_collector(collect_sessions(store))
+    # Prometheus-style endpoint; runall.py gives every bot its own port
+    metrics_server = await start_metrics_server(
+        port=int(os.getenv("METRICS_PORT") or 0), path=os.getenv("METRICS_SOCKET")
+    )
+    scheduler.start()
+    tasks = [asyncio.create_task(run_bot(bot)) for bot in bots]
+    try:
+        if stop_event is None:
+            await asyncio.gather(*tasks)
+        else:
+            stopper = asyncio.create_task(stop_event.wait())
+            await asyncio.wait([stopper, *tasks], return_when=asyncio.FIRST_COMPLETED)
+            if stop_event.is_set():
+                print("\n🛑 Shutting down all personas...")
+            else:
+                # Keep serving until every persona has stopped on its own
+                await asyncio.wait([stopper, asyncio.gather(*tasks)], return_when=asyncio.FIRST_COMPLETED)
+            stopper.cancel()
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        await asyncio.gather(*(bot.close() for bot in bots), return_exceptions=True)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await scheduler.stop()
+        await store.close()
+        await close_http_client()
+
+
+def run_standalone(persona):
+    # Entry point for `python main.py` inside a bot folder
+    load_dotenv(os.path.join(persona.directory, ".env"))
+
+    # Config Validation
+    discord_token = os.getenv("DISCORD_TOKEN")
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not discord_token:
+        raise ValueError("Missing DISCORD_TOKEN in .env file")
+    if not api_key:
+        raise ValueError("Missing OPENROUTER_API_KEY in .env file")
+
+    discord.utils.setup_logging()
+    scheduler = Scheduler()
+    store = SessionStore(SessionDB(os.getenv("SESSION_DB_PATH") or os.path.join(persona.directory, SESSION_DB_NAME)))
+    bot = PersonaBot(persona, discord_token, api_key, store.for_persona(persona.name), scheduler)
+
+    async def main():
+        # Stopped by runall with SIGTERM: serve() still flushes the session store
+        stop_event = asyncio.Event()
+        install_signal_handlers(stop_event)
+        await serve([bot], scheduler, store, stop_event)
+
+    asyncio.run(main())
+
+
+async def run_host(bot_dirs, db_path, stop_event=None):
+    # Every persona in one event loop: one HTTP pool, one session store, one
+    # scheduler. Tokens still come from each bot folder's own .env, since
+    # load_dotenv() would let the first persona's token win for everyone.
+    discord.utils.setup_logging()
+    sessions = SessionStore(SessionDB(os.getenv("SESSION_DB_PATH") or db_path))
+    scheduler = Scheduler()
+    bots = []
+
+    for bot_dir in bot_dirs:
+        if not os.path.isfile(os.path.join(bot_dir, "main.py")):
+            print(f"❌ Error: {os.path.join(bot_dir, 'main.py')} does not exist!")
+            continue
+        persona = load_persona(bot_dir)
+        values = dotenv_values(os.path.join(bot_dir, ".env"))
+        discord_token = values.get("DISCORD_TOKEN") or os.getenv(f"{persona.name.upper()}_DISCORD_TOKEN")
+        api_key = values.get("OPENROUTER_API_KEY") or os.getenv("OPENROUTER_API_KEY")
+        if not discord_token or not api_key:
+            print(f"❌ Skipping {persona.name}: missing DISCORD_TOKEN or OPENROUTER_API_KEY")
+            continue
+
+        print(f"🚀 Loading persona {persona.name} from: {bot_dir}")
+        bots.append(PersonaBot(persona, discord_token, api_key, sessions.for_persona(persona.name), scheduler))
+
+    if not bots:
+        print("❌ No personas could be loaded")
+        return
+    await serve(bots, scheduler, sessions, stop_event)
@@ -0,0 +1,158 @@
+import bisect
+from collections import Counter
+
+# Process-wide counters and gauges, keyed by (name, sorted label pairs)
+counters = Counter()
+gauges = {}
+
+# Called before every export to refresh gauges that are read, not pushed
+collectors = []
+
+# Histogram bucket upper bounds: quarter powers of two (~19% apart) from 1ms
+# up to ~8h, which covers latencies in seconds as well as token rates and
+# per-reply counts
+BUCKET_BOUNDS = tuple(0.001 * 2 ** (i / 4) for i in range(100))
+
+
+def incr(name, value=1, **labels):
+    counters[(name, tuple(sorted(labels.items())))] += value
+
+
+def counter_value(name, **labels):
+    return counters[(name, tuple(sorted(labels.items())))]
+
+
+def set_gauge(name, value, **labels):
+    gauges[(name, tuple(sorted(labels.items())))] = value
+
+
+def add_gauge(name, delta, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    gauges[key] = gauges.get(key, 0) + delta
+
+
+def register_collector(collect):
+    if collect not in collectors:
+        collectors.append(collect)
+
+
+class Histogram:
+    # Fixed log-scale buckets plus count/sum/min/max. Observing is a bisect
+    # and an increment; quantiles are estimated within the bucket they land in.
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                low = BUCKET_BOUNDS[i - 1] if i else 0.0
+                high = min(BUCKET_BOUNDS[i], self.max) if i < len(BUCKET_BOUNDS) else self.max
+                estimate = low + (high - low) * (rank - seen) / n
+                return min(max(estimate, self.min), self.max)
+            seen += n
+        return self.max
+
+
+histograms = {}  # {(name, sorted label pairs): Histogram}
+
+
+def observe(name, value, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = histograms[key] = Histogram()
+    histogram.observe(value)
+
+
+def histogram(name, **labels):
+    return histograms.get((name, tuple(sorted(labels.items()))))
+
+
+def summary(name=None):
+    # One row per histogram: name, labels and its aggregate figures
+    rows = []
+    for (metric, labels), h in sorted(histograms.items()):
+        if name is not None and metric != name:
+            continue
+        rows.append({
+            "name": metric,
+            "labels": dict(labels),
+            "count": h.count,
+            "mean": h.mean(),
+            "p50": h.quantile(0.5),
+            "p90": h.quantile(0.9),
+            "p99": h.quantile(0.99),
+            "max": h.max,
+        })
+    return rows
+
+
+def format_summary(name=None):
+    lines = []
+    for row in summary(name):
+        labels = ",".join(f"{k}={v}" for k, v in row["labels"].items())
+        lines.append(
+            f"{row['name']}{{{labels}}} n={row['count']} mean={row['mean']:.3f} "
+            f"p50={row['p50']:.3f} p90={row['p90']:.3f} p99={row['p99']:.3f} max={row['max']:.3f}"
+        )
+    return "\n".join(lines)
+
+
+def _labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def render():
+    # Everything in the Prometheus text format. Counters get a _total
+    # suffix; histograms are exported as summaries (quantiles, _sum, _count).
+    for collect in collectors:
+        try:
+            collect()
+        except Exception as e:
+            print(f"Metrics collector failed: {type(e).__name__}: {e}")
+
+    lines = []
+    typed = set()
+
+    def declare(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        declare(f"{name}_total", "counter")
+        lines.append(f"{name}_total{_labels(labels)} {value}")
+    for (name, labels), value in sorted(gauges.items()):
+        declare(name, "gauge")
+        lines.append(f"{name}{_labels(labels)} {value}")
+    for (name, labels), h in sorted(histograms.items()):
+        declare(name, "summary")
+        for q in (0.5, 0.9, 0.99):
+            lines.append(f"{name}{_labels(labels, [('quantile', q)])} {h.quantile(q)}")
+        lines.append(f"{name}_sum{_labels(labels)} {h.total}")
+        lines.append(f"{name}_count{_labels(labels)} {h.count}")
+    return "\n".join(lines) + "\n"
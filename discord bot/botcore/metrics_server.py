@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+
+from botcore.metrics import incr, observe, register_collector, render, set_gauge
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+LAG_INTERVAL = 1.0  # Seconds between event-loop lag probes
+SCRAPE_TIMEOUT = 5.0
+
+
+class DiscordRateLimitCounter(logging.Handler):
+    # discord.py handles 429s itself and only logs them; count those records
+    def __init__(self):
+        super().__init__(logging.WARNING)
+
+    def emit(self, record):
+        if not isinstance(record.msg, str):
+            return
+        if record.msg.startswith("We are being rate limited."):
+            incr("discord_rate_limited", method=record.args[0] if record.args else "")
+        elif record.msg.startswith("Global rate limit"):
+            incr("discord_global_rate_limited")
+
+
+def rss_bytes():
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current, in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def collect_process():
+    rss = rss_bytes()
+    if rss is not None:
+        set_gauge("process_rss_bytes", rss)
+
+
+def track_event_loop_lag(scheduler):
+    # A job that should run every LAG_INTERVAL; how late it runs is how long
+    # the loop was busy with something else
+    expected = [time.monotonic() + LAG_INTERVAL]
+
+    async def probe():
+        now = time.monotonic()
+        lag = max(now - expected[0], 0.0)
+        expected[0] = now + LAG_INTERVAL
+        set_gauge("event_loop_lag_seconds", lag)
+        observe("event_loop_lag", lag)
+
+    scheduler.every(LAG_INTERVAL, probe)
+
+
+_rate_limit_counter = None
+
+
+def install_process_metrics(scheduler):
+    global _rate_limit_counter
+    if _rate_limit_counter is None:
+        _rate_limit_counter = DiscordRateLimitCounter()
+        logging.getLogger("discord.http").addHandler(_rate_limit_counter)
+    register_collector(collect_process)
+    track_event_loop_lag(scheduler)
+
+
+async def handle_scrape(reader, writer, render_text):
+    # Just enough HTTP/1.0 for Prometheus or curl: any GET gets the metrics
+    try:
+        request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), SCRAPE_TIMEOUT)
+        if not request.startswith(b"GET "):
+            writer.write(b"HTTP/1.0 405 Method Not Allowed\r\nContent-Length: 0\r\n\r\n")
+        else:
+            text = render_text()
+            if asyncio.iscoroutine(text):
+                text = await text
+            body = text.encode()
+            writer.write(
+                b"HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                + body
+            )
+        await writer.drain()
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(render_text=render, port=None, path=None):
+    # Serve render_text() on 127.0.0.1:port, or on a Unix socket at path.
+    # Returns None when neither is configured.
+    async def handle(reader, writer):
+        await handle_scrape(reader, writer, render_text)
+
+    if path:
+        if os.path.exists(path):
+            os.unlink(path)  # Left over from a previous run
+        server = await asyncio.start_unix_server(handle, path=path)
+        print(f"📈 Metrics on unix:{path}")
+        return server
+    if port:
+        server = await asyncio.start_server(handle, "127.0.0.1", int(port))
+        print(f"📈 Metrics on http://127.0.0.1:{port}/metrics")
+        return server
+    return None
+
+
+async def scrape(port=None, path=None):
+    # Fetch another process's exposition, for aggregation
+    if path:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection("127.0.0.1", int(port))
+    try:
+        writer.write(b"GET /metrics HTTP/1.0\r\nHost: localhost\r\n\r\n")
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), SCRAPE_TIMEOUT)
+    finally:
+        writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    if not head.startswith(b"HTTP/1.0 200") and not head.startswith(b"HTTP/1.1 200"):
+        raise ConnectionError(head.split(b"\r\n", 1)[0].decode(errors="replace"))
+    return body.decode()
+
+
+def aggregate(expositions):
+    # Merge {bot: exposition} into one, with bot="..." on every sample.
+    # Samples of a metric family stay together under a single TYPE line.
+    families = {}  # {family: [type line, samples...]}, in first-seen order
+    for source, text in expositions.items():
+        family = None
+        for line in text.splitlines():
+            if line.startswith("# TYPE "):
+                family = line.split()[2]
+                families.setdefault(family, [line])
+            elif line and not line.startswith("#"):
+                name = family or line.split("{", 1)[0].split(" ", 1)[0]
+                families.setdefault(name, [f"# TYPE {name} untyped"]).append(_with_label(line, source))
+    return "\n".join(line for lines in families.values() for line in lines) + "\n"
+
+
+def _with_label(line, source):
+    label = f'bot="{source}"'
+    metric, _, rest = line.partition(" ")
+    if '{bot="' in metric or ',bot="' in metric:
+        return line  # Already about a specific bot (the supervisor's own series)
+    if "{" in metric:
+        return line.replace("{", "{" + label + ",", 1)
+    return f"{metric}{{{label}}} {rest}"
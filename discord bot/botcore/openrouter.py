@@ -0,0 +1,311 @@
+import asyncio
+import os
+import time
+import httpx
+
+from botcore.discord_output import ChannelSender, EditingSender
+from botcore.metrics import add_gauge, incr, observe
+from botcore.recording import start_capture
+from botcore.resilience import (
+    MAX_ATTEMPTS,
+    TRANSPORT_ERRORS,
+    APIError,
+    UpstreamError,
+    breaker_for,
+    retry_delay,
+)
+from botcore.sse import DONE, ResumeFilter, SSEParser, SentenceSplitter, delta_content
+from botcore.tokens import message_tokens
+
+STREAM_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+CANCEL_FLUSH_TIMEOUT = 2.0  # Seconds a stopped reply gets to post what was already read
+
+_http_client = None
+
+
+def _env_flag(name, default="0"):
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_http_client():
+    # One pooled client per process: connections to openrouter.ai are kept
+    # alive between turns instead of paying a TCP+TLS handshake every message.
+    # Pool settings are read on first use so each bot's .env is already loaded.
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        http2 = _env_flag("OPENROUTER_HTTP2")
+        if http2 and not _http2_available():
+            print("⚠️ OPENROUTER_HTTP2 is set but 'h2' is not installed, using HTTP/1.1")
+            http2 = False
+        _http_client = httpx.AsyncClient(
+            timeout=STREAM_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "20")),
+                max_keepalive_connections=int(os.getenv("OPENROUTER_MAX_KEEPALIVE", "10")),
+                keepalive_expiry=float(os.getenv("OPENROUTER_KEEPALIVE_EXPIRY", "90")),
+            ),
+            http2=http2,
+        )
+    return _http_client
+
+
+def use_http_client(client):
+    # Swap in another client, e.g. one with a replay transport for benchmarks
+    global _http_client
+    _http_client = client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+
+
+def api_base_url():
+    # Read on use so each bot's .env is already loaded; OPENROUTER_BASE_URL
+    # points the bots at a proxy or at bench/fake_openrouter.py
+    return os.getenv("OPENROUTER_BASE_URL", DEFAULT_BASE_URL)
+
+
+async def validate_api_key(api_key):
+    try:
+        resp = await get_http_client().get(
+            f"{api_base_url()}/auth/key",
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=10
+        )
+        if resp.status_code != 200:
+            raise APIError(f"Invalid API key (HTTP {resp.status_code})")
+    except Exception as e:
+        raise APIError(f"API validation failed: {str(e)}")
+
+
+async def complete(messages, *, api_key, model, title, temperature=0.3, max_tokens=None):
+    # Plain (non-streaming) completion for background work such as summaries
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "https://github.com/your-repo",
+        "X-Title": title
+    }
+    data = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature
+    }
+    if max_tokens:
+        data["max_tokens"] = max_tokens
+
+    breaker = breaker_for(model)
+    for attempt in range(MAX_ATTEMPTS):
+        breaker.check()
+        try:
+            response = await get_http_client().post(f"{api_base_url()}/chat/completions", headers=headers, json=data)
+            if response.status_code != 200:
+                raise UpstreamError(response.status_code, response.text, response.headers)
+            breaker.record_success()
+            break
+        except (UpstreamError, *TRANSPORT_ERRORS) as e:
+            breaker.record_failure(e)
+            delay = retry_delay(e, attempt)
+            if delay is None or attempt == MAX_ATTEMPTS - 1:
+                raise e if isinstance(e, APIError) else APIError(f"Connection failed: {str(e)}")
+            await asyncio.sleep(delay)
+        except BaseException:
+            breaker.release()
+            raise
+    try:
+        return response.json()["choices"][0]["message"]["content"].strip()
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        raise APIError("API Error: malformed completion response")
+
+
+def make_sender(channel, stream_mode="messages", placeholder=None):
+    # The SSE reader only queues finished segments; a separate task posts
+    # them, so Discord latency never stalls the model stream. In "edit" mode
+    # the reply is streamed into one progressively edited message.
+    if stream_mode == "edit":
+        return EditingSender(channel, placeholder)
+    return ChannelSender(channel)
+
+
+async def stream_response(
+    messages,
+    channel,
+    *,
+    api_key,
+    model,
+    title,
+    temperature=0.7,
+    stream_mode="messages",
+    placeholder=None,
+    splitter=None,
+    sender=None,
+):
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "https://github.com/your-repo",
+        "X-Title": title
+    }
+    # Callers pass their own sender to learn what was actually posted if they
+    # cancel the reply
+    if sender is None:
+        sender = make_sender(channel, stream_mode, placeholder)
+    sender.start()
+    # One splitter across attempts: a retry continues the same reply rather
+    # than starting a new one, so nothing already posted is posted again.
+    # Callers pass their own to read the partial reply if they cancel it.
+    if splitter is None:
+        splitter = SentenceSplitter()
+    http_client = get_http_client()
+    tags = {"persona": title, "model": model}
+    started = time.monotonic()
+    first_token_at = None
+    chunks = 0  # Content chunks across attempts; usually, but not always, one token each
+    # Shared by every session on this model: once the upstream keeps failing,
+    # new turns are refused straight away instead of each timing out on it
+    breaker = breaker_for(model)
+    add_gauge("llm_streams_in_flight", 1, **tags)
+    try:
+        async with channel.typing():
+            for attempt in range(MAX_ATTEMPTS):
+                breaker.check()
+                delivered = splitter.text()
+                request_messages = messages
+                if delivered:
+                    # Resume: hand the partial answer back as an assistant
+                    # prefix and let the model continue from it
+                    request_messages = messages + [{"role": "assistant", "content": delivered}]
+                resume = ResumeFilter(delivered)
+                received = 0
+                data = {
+                    "model": model,
+                    "messages": request_messages,
+                    "temperature": temperature,
+                    "stream": True
+                }
+                attempt_started = time.monotonic()
+                recorder = None
+                try:
+                    async with http_client.stream(
+                        "POST",
+                        f"{api_base_url()}/chat/completions",
+                        headers=headers,
+                        json=data
+                    ) as response:
+                        # Connection (reused or new) plus OpenRouter routing, up to the response headers
+                        observe("llm_connect_seconds", time.monotonic() - attempt_started, **tags)
+                        if response.status_code != 200:
+                            error = await response.aread()
+                            raise UpstreamError(
+                                response.status_code, error.decode(errors="replace"), response.headers
+                            )
+
+                        recorder = start_capture(title, model, attempt_started)
+                        if recorder is not None:
+                            recorder.headers()
+
+                        parser = SSEParser()
+                        done = False
+                        async for chunk in response.aiter_bytes():
+                            if recorder is not None:
+                                recorder.chunk(chunk)
+                            if done:
+                                # Read the body to its end: a response closed
+                                # early takes its connection out of the pool
+                                continue
+                            for payload in parser.feed(chunk):
+                                if payload == DONE:
+                                    done = True
+                                    break
+                                token = delta_content(payload)
+                                if token:
+                                    received += 1
+                                    if first_token_at is None:
+                                        first_token_at = time.monotonic()
+                                        observe("llm_ttft_seconds", first_token_at - started, **tags)
+                                segment = splitter.feed(resume.feed(token))
+                                if segment:
+                                    await sender.put(segment)
+                        if not done:
+                            # Stream ended without [DONE]; keep a final unterminated event
+                            for payload in parser.close():
+                                segment = splitter.feed(resume.feed(delta_content(payload)))
+                                if segment:
+                                    await sender.put(segment)
+
+                        segment = splitter.feed(resume.flush())
+                        if segment:
+                            await sender.put(segment)
+                        breaker.record_success()
+                        if recorder is not None:
+                            recorder.save("done" if done else "eof")
+                        await sender.put(splitter.rest())
+                        await sender.close()
+                        chunks += received
+                        finished = time.monotonic()
+                        observe("llm_stream_seconds", finished - started, **tags)
+                        if first_token_at is not None and finished > first_token_at:
+                            observe("llm_chunks_per_second", chunks / (finished - first_token_at), **tags)
+                        observe("discord_sends_per_reply", sender.sent + sender.edits, **tags)
+                        observe("discord_send_seconds_per_reply", sender.send_latency, **tags)
+                        if resume.dropped:
+                            incr("llm_resume_dropped_chars", resume.dropped, model=model)
+                        return splitter.text().strip()
+
+                except (UpstreamError, *TRANSPORT_ERRORS) as e:
+                    if recorder is not None:
+                        recorder.save(type(e).__name__)
+                    breaker.record_failure(e)
+                    delay = retry_delay(e, attempt)
+                    # What the failed attempt cost: the whole prompt again plus
+                    # whatever it generated before dying
+                    incr("llm_failed_attempts", model=model)
+                    incr("llm_failed_prompt_tokens", sum(message_tokens(m) for m in request_messages), model=model)
+                    incr("llm_failed_completion_tokens", received, model=model)
+                    chunks += received
+                    # Text held back by the resume check was read and paid for
+                    segment = splitter.feed(resume.flush())
+                    if segment:
+                        await sender.put(segment)
+                    if delay is None:
+                        raise  # Not worth retrying: a bad request, or a long Retry-After
+                    if attempt == MAX_ATTEMPTS - 1:
+                        if isinstance(e, APIError):
+                            raise
+                        raise APIError(f"Connection failed after {MAX_ATTEMPTS} attempts: {str(e)}")
+                    incr("llm_retries", model=model, reason=getattr(e, "status_code", type(e).__name__))
+                    await asyncio.sleep(delay)
+                    continue
+                except BaseException:
+                    breaker.release()
+                    raise
+    except asyncio.CancelledError:
+        # Stopped, superseded or closed: what was already queued still goes
+        # out, so the partial reply kept as context matches what was shown
+        await sender.abort(CANCEL_FLUSH_TIMEOUT)
+        raise
+    except Exception:
+        # Deliver whatever was already read before reporting the failure
+        try:
+            await sender.put(splitter.rest())
+            await sender.close()
+        except Exception:
+            pass
+        raise
+    finally:
+        sender.cancel()
+        add_gauge("llm_streams_in_flight", -1, **tags)
@@ -0,0 +1,370 @@
+import asyncio
+import functools
+import time
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+from botcore.capacity import guild_capacity
+from botcore.completion_queue import DEFAULT_LANE, get_completion_queue
+from botcore.context_window import DEFAULT_BUDGET, SUMMARY_HEADROOM, fit_to_budget, summarize, with_summary
+from botcore.discord_output import QueueNotice
+from botcore.metrics import incr, observe
+from botcore.openrouter import APIError, make_sender, stream_response, validate_api_key
+from botcore.resilience import CircuitOpenError, UpstreamError, breaker_for, server_retry_after
+from botcore.surfaces import DEFAULT_SURFACE, SURFACES
+
+INACTIVITY_LIMIT = timedelta(minutes=30)
+RESTORE_GRACE = 120  # Seconds a restored session gets before expiring, so the client can log in first
+TURN_DEBOUNCE = 1.0  # Seconds of quiet before messages sent in a row are answered as one turn
+
+
+class Persona:
+    # Everything that makes one bot different from the others. Each bot's
+    # main.py builds one of these as PERSONA so it can run on its own or be
+    # loaded as a plugin by the multi-persona host.
+    def __init__(
+        self,
+        name,
+        directory,
+        model_name,
+        system_prompt,
+        session_modes,
+        channel_name,
+        welcome_message,
+        thinking_message,
+        temperature=0.7,
+        context_budget=DEFAULT_BUDGET,
+        stream_mode="messages",
+    ):
+        self.name = name  # Shown in logs, channel topics and the X-Title header
+        self.directory = directory  # Folder holding the bot's .env
+        self.model_name = model_name
+        self.system_prompt = system_prompt
+        self.session_modes = session_modes
+        self.channel_name = channel_name  # Formatted with display_name and suffix
+        self.welcome_message = welcome_message  # welcome_message(user, mode_config) -> str
+        self.thinking_message = thinking_message
+        self.temperature = temperature
+        self.context_budget = context_budget  # Estimated prompt tokens per request
+        self.stream_mode = stream_mode  # "messages" (coalesced sends) or "edit" (one edited message)
+
+
+class PersonaBot:
+    # One Discord client serving one persona. The session store and scheduler
+    # are passed in so several bots can share them inside one process.
+    def __init__(self, persona, discord_token, api_key, sessions, scheduler):
+        self.persona = persona
+        self.discord_token = discord_token
+        self.api_key = api_key
+        self.sessions = sessions
+        self.scheduler = scheduler
+        self.surfaces = {kind: surface(persona, scheduler) for kind, surface in SURFACES.items()}
+        self.opening = set()  # Users whose session channel is being created or waiting for room
+
+        # Discord Client Setup
+        intents = discord.Intents.default()
+        intents.messages = True
+        intents.message_content = True
+        self.client = discord.Client(intents=intents)
+        self.client.event(self.on_ready)
+        self.client.event(self.on_message)
+        self.client.event(self.on_guild_channel_delete)
+
+    async def start(self):
+        await self.restore_sessions()
+        async with self.client:
+            await self.client.start(self.discord_token)
+
+    async def close(self):
+        await self.client.close()
+
+    def surface_of(self, mode):
+        # Channel or thread backend for a session mode ("!dominus", ...)
+        config = self.persona.session_modes.get(mode, {})
+        return self.surfaces[config.get("surface", DEFAULT_SURFACE)]
+
+    async def close_session(self, channel, user_id):
+        # Stop generating before the channel goes away under the stream
+        session = self.sessions.by_user(user_id)
+        if session is not None:
+            self.stop_generation(session, "close", drop_pending=True)
+            if session.turn_task is not None:
+                session.turn_task.cancel()
+        try:
+            await channel.send("🛑 Closing session...")
+            await asyncio.sleep(1)
+            # A dormant session has no Session yet; its mode was persisted
+            await self.surface_of(self.sessions.mode_of(user_id)).close(channel)
+        except Exception as e:
+            print(f"Error closing channel: {e}")
+        finally:
+            self.sessions.close(user_id)
+            self.scheduler.cancel_expiry((self.persona.name, user_id))
+
+    def touch_session(self, session):
+        # Push the session's inactivity deadline back to INACTIVITY_LIMIT from now
+        self.sessions.touch(session)
+        self.arm_expiry(session.user_id, INACTIVITY_LIMIT.total_seconds())
+
+    def arm_expiry(self, user_id, delay):
+        self.scheduler.expire_after(
+            (self.persona.name, user_id),
+            delay,
+            functools.partial(self.expire_session, user_id),
+        )
+
+    async def restore_sessions(self):
+        # Sessions persisted by a previous run stay dormant until their owner
+        # speaks again; only their expiry is re-armed here.
+        now = datetime.now(timezone.utc)
+        for user_id, last_active in await self.sessions.load_dormant():
+            remaining = (last_active + INACTIVITY_LIMIT - now).total_seconds()
+            self.arm_expiry(user_id, max(remaining, RESTORE_GRACE))
+
+    async def expire_session(self, user_id):
+        channel_id = self.sessions.channel_of(user_id)
+        if channel_id is None:
+            return
+        channel = self.client.get_channel(channel_id)
+        if channel:
+            await self.close_session(channel, user_id)
+        else:
+            self.sessions.close(user_id)
+
+    def lane_of(self, session):
+        # Completion queue lane for the session's mode ("paid", "free", ...)
+        return self.persona.session_modes.get(session.mode, {}).get("lane", DEFAULT_LANE)
+
+    def request_context(self, session):
+        return with_summary(session.context[0], session.summary, session.unsummarized_turns())
+
+    def schedule_summary(self, session):
+        # Runs in the idle gap after a reply, never on the path of the next one
+        if session.summary_task is None or session.summary_task.done():
+            session.summary_task = self.scheduler.spawn(self.summarize_old_turns(session))
+
+    async def summarize_old_turns(self, session):
+        # Fold the turns that are about to fall out of the window into the
+        # running summary, before the next request would have to drop them
+        target = int(self.persona.context_budget * SUMMARY_HEADROOM)
+        _, dropped, _ = fit_to_budget(self.request_context(session), target)
+        if not dropped:
+            return
+        try:
+            async with get_completion_queue().slot("background"):
+                summary = await summarize(session.summary, dropped, api_key=self.api_key, title=self.persona.name)
+        except APIError as e:
+            print(f"Summary failed for {self.persona.name}/{session.user_id}: {e}")
+            return
+        if summary and self.sessions.by_user(session.user_id) is session:
+            self.sessions.save_summary(session, summary, len(dropped))
+
+    async def send_degraded(self, channel, retry_in):
+        await channel.send(
+            f"⏳ {self.persona.name} is temporarily unavailable: the model provider is failing. "
+            f"Please try again in about {int(retry_in) + 1}s."
+        )
+
+    async def generate(self, session, channel, window, sender):
+        # The cancellable part of a turn: queueing for a slot and streaming.
+        # Cancelling it closes the HTTP stream and gives the slot back.
+        notice = QueueNotice(channel, self.persona.name)
+        queued_at = time.monotonic()
+        try:
+            async with get_completion_queue().slot(self.lane_of(session), on_wait=notice.update):
+                observe(
+                    "llm_queue_wait_seconds",
+                    time.monotonic() - queued_at,
+                    persona=self.persona.name,
+                    model=self.persona.model_name,
+                )
+                await notice.clear()
+                return await stream_response(
+                    window,
+                    channel,
+                    api_key=self.api_key,
+                    model=self.persona.model_name,
+                    title=self.persona.name,
+                    temperature=self.persona.temperature,
+                    stream_mode=self.persona.stream_mode,
+                    placeholder=self.persona.thinking_message,
+                    sender=sender,
+                )
+        finally:
+            await notice.clear()
+
+    async def on_ready(self):
+        try:
+            await validate_api_key(self.api_key)
+            print(f"✅ {self.persona.name} online as {self.client.user}")
+            print(f"🔗 Invite: https://discord.com/oauth2/authorize?client_id={self.client.user.id}&permissions=2147485696")
+            self.prefill_channels()
+        except Exception as e:
+            print(f"❌ Startup failed: {e}")
+            await self.client.close()
+
+    def prefill_channels(self):
+        # Standby channels for every channel-backed mode, in the guild of its
+        # command channel
+        for command, config in self.persona.session_modes.items():
+            lobby = self.client.get_channel(config["allowed_channel_id"])
+            if lobby is not None:
+                self.surface_of(command).prefill(lobby, config)
+
+    async def on_guild_channel_delete(self, channel):
+        # Room freed by anyone, not just our own sessions, admits the next in line
+        guild_capacity(channel.guild).notify()
+
+    async def on_message(self, message):
+        if message.author == self.client.user:
+            return
+
+        # Only session owners are tracked; other chatters cost nothing here
+        owned = self.sessions.by_user(message.author.id)
+        if owned is None and self.sessions.is_dormant(message.author.id):
+            owned = await self.sessions.restore(
+                message.author.id, {"role": "system", "content": self.persona.system_prompt}
+            )
+        if owned is not None:
+            self.touch_session(owned)
+
+        # Handle session commands
+        for command, config in self.persona.session_modes.items():
+            if message.content.lower().startswith(command):
+                allowed_channel_id = config["allowed_channel_id"]
+                if message.channel.id != allowed_channel_id:
+                    try:
+                        await message.delete()
+                        await message.author.send(f"❌ `{command}` must be used in <#{allowed_channel_id}>")
+                    except discord.Forbidden:
+                        pass
+                    return
+
+                if message.author.id in self.sessions or message.author.id in self.opening:
+                    await message.channel.send("⚠️ You already have an active session")
+                    return
+
+                self.opening.add(message.author.id)
+                try:
+                    channel = await self.surface_of(command).open(message.channel, message.author, config)
+                finally:
+                    self.opening.discard(message.author.id)
+                if not channel:
+                    return
+
+                session = self.sessions.open(
+                    message.author.id,
+                    channel.id,
+                    [{"role": "system", "content": self.persona.system_prompt}],
+                    command,
+                )
+                self.touch_session(session)
+                # Send welcome message
+                await channel.send(self.persona.welcome_message(message.author, config))
+                return
+
+        session = self.sessions.by_channel(message.channel.id)
+        if session is None:
+            return
+
+        if message.content.lower() == "!close":
+            await self.close_session(message.channel, session.user_id)
+            return
+
+        if session.user_id != message.author.id:
+            return
+
+        if message.content.lower() == "!stop":
+            generation = session.generation
+            if self.stop_generation(session, "stop", drop_pending=True):
+                # Let the reply post what it already had before confirming
+                await asyncio.wait([generation])
+                await message.channel.send("⏹️ Stopped.")
+            return
+
+        # The model's upstream is down: say so at once rather than after a timeout
+        retry_in = breaker_for(self.persona.model_name).retry_in()
+        if retry_in:
+            await self.send_degraded(message.channel, retry_in)
+            return
+
+        # One turn at a time per session: messages sent in quick succession,
+        # or while a reply is still streaming, are answered together
+        session.pending.append(message.content)
+        session.pending_at = time.monotonic()
+        # A new message supersedes the reply still streaming; it is answered
+        # next, with what was generated so far kept as context
+        self.stop_generation(session, "supersede")
+        if session.turn_task is None or session.turn_task.done():
+            session.turn_task = self.scheduler.spawn(self.run_turns(session, message.channel))
+
+    async def run_turns(self, session, channel):
+        while session.pending:
+            # Wait until the owner has stopped typing for TURN_DEBOUNCE
+            while (delay := session.pending_at + TURN_DEBOUNCE - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            if self.sessions.by_user(session.user_id) is not session:
+                return  # Closed in the meantime
+            if not session.pending:
+                continue  # Dropped by !stop while waiting
+            content = "\n\n".join(session.pending)
+            session.pending.clear()
+            await self.answer(session, channel, content)
+
+    def stop_generation(self, session, reason, drop_pending=False):
+        # Cancel the reply being generated, if any. Returns True if one was.
+        if drop_pending:
+            session.pending.clear()
+        generation = session.generation
+        if generation is None or generation.done():
+            return False
+        generation.cancel()
+        incr("llm_cancelled", persona=self.persona.name, reason=reason)
+        return True
+
+    async def answer(self, session, channel, content):
+        try:
+            self.sessions.append(session, "user", content)
+            if self.persona.stream_mode != "edit":
+                await channel.send(self.persona.thinking_message, delete_after=3)
+            window, dropped, saved = fit_to_budget(self.request_context(session), self.persona.context_budget)
+            if saved:
+                print(f"✂️ {self.persona.name}: trimmed {len(dropped)} old turns for {session.user_id}, ~{saved} tokens saved")
+            sender = make_sender(channel, self.persona.stream_mode, self.persona.thinking_message)
+            generation = session.generation = asyncio.ensure_future(self.generate(session, channel, window, sender))
+            try:
+                # wait() rather than await: a cancelled generation is not an
+                # error here, only this task being cancelled is
+                await asyncio.wait([generation])
+            except asyncio.CancelledError:
+                generation.cancel()
+                raise
+            finally:
+                session.generation = None
+                if generation.cancelled():
+                    # Keep what the user was shown before the stop, as long
+                    # as the session is still open to keep it in
+                    partial = sender.delivered_text().strip()
+                    if partial and self.sessions.by_user(session.user_id) is session:
+                        self.sessions.append(session, "assistant", partial)
+            if generation.cancelled():
+                return
+            reply = generation.result()
+            if reply:
+                self.sessions.append(session, "assistant", reply)
+                self.schedule_summary(session)
+        except CircuitOpenError as e:
+            await self.send_degraded(channel, e.retry_in)
+        except UpstreamError as e:
+            if e.status_code == 429:
+                wait = server_retry_after(e.headers)
+                when = f"in about {int(wait) + 1}s" if wait else "in a moment"
+                await channel.send(f"⏳ {self.persona.name} is rate limited right now. Please try again {when}.")
+            else:
+                await channel.send(f"⚠️ API Error: {str(e)}")
+        except APIError as e:
+            await channel.send(f"⚠️ API Error: {str(e)}")
+        except Exception as e:
+            await channel.send(f"⚠️ Unexpected error: {str(e)[:500]}")
+            print(f"Error: {type(e).__name__}: {e}")
@@ -0,0 +1,144 @@
+import asyncio
+import gzip
+import itertools
+import json
+import os
+import random
+import re
+import struct
+import time
+
+import httpx
+
+# Capture of raw OpenRouter SSE responses, for replaying real reply shapes
+# through the parser and senders. Set OPENROUTER_CAPTURE_DIR to record every
+# successful stream attempt (OPENROUTER_CAPTURE_RATE samples a share of them).
+# Recordings hold the model's replies but not the prompts.
+#
+# File format (gzip): MAGIC, one JSON metadata line, then one frame per chunk
+# as it came off the socket: offset in seconds since the request was sent
+# (float64), length (uint32), bytes.
+MAGIC = b"SSEREC1\n"
+FRAME = struct.Struct(">dI")
+
+_sequence = itertools.count()
+
+
+class StreamRecorder:
+    def __init__(self, path, meta, started):
+        self.path = path
+        self.meta = meta
+        self.started = started
+        self.chunks = []  # [(offset, bytes)]
+
+    def headers(self):
+        self.meta["headers_at"] = time.monotonic() - self.started
+
+    def chunk(self, data):
+        self.chunks.append((time.monotonic() - self.started, data))
+
+    def save(self, outcome):
+        # Written on a worker thread so the event loop never waits on gzip
+        self.meta["outcome"] = outcome
+        self.meta["bytes"] = sum(len(data) for _, data in self.chunks)
+        return asyncio.get_running_loop().run_in_executor(None, self._write)
+
+    def _write(self):
+        try:
+            with gzip.open(self.path, "wb") as f:
+                f.write(MAGIC)
+                f.write(json.dumps(self.meta).encode() + b"\n")
+                for offset, data in self.chunks:
+                    f.write(FRAME.pack(offset, len(data)))
+                    f.write(data)
+        except OSError as e:
+            print(f"Stream capture failed: {e}")
+
+
+def start_capture(persona, model, started):
+    # A recorder for this attempt, or None when capture is off
+    directory = os.getenv("OPENROUTER_CAPTURE_DIR")
+    if not directory or random.random() >= float(os.getenv("OPENROUTER_CAPTURE_RATE", "1")):
+        return None
+    os.makedirs(directory, exist_ok=True)
+    name = re.sub(r"[^A-Za-z0-9.-]+", "_", f"{persona}-{model}")
+    path = os.path.join(directory, f"{name}-{int(time.time())}-{os.getpid()}-{next(_sequence)}.sse.gz")
+    meta = {"persona": persona, "model": model, "captured_at": time.time()}
+    return StreamRecorder(path, meta, started)
+
+
+def is_recording(path):
+    try:
+        with gzip.open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def load_recording(path):
+    # Returns (metadata, [(offset, bytes)])
+    with gzip.open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a stream recording")
+        meta = json.loads(f.readline())
+        chunks = []
+        while True:
+            header = f.read(FRAME.size)
+            if len(header) < FRAME.size:
+                break
+            offset, length = FRAME.unpack(header)
+            chunks.append((offset, f.read(length)))
+    return meta, chunks
+
+
+def find_recordings(paths):
+    # Files as given, directories expanded to the recordings inside them
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".sse.gz")
+            )
+        else:
+            found.append(path)
+    return found
+
+
+class ReplayStream(httpx.AsyncByteStream):
+    # Yields recorded chunks with their original spacing divided by speed
+    # (0 = no waiting at all)
+    def __init__(self, chunks, speed=1.0, headers_at=0.0):
+        self.chunks = chunks
+        self.speed = speed
+        self.headers_at = headers_at
+
+    async def __aiter__(self):
+        clock = self.headers_at
+        for offset, data in self.chunks:
+            if self.speed and offset > clock:
+                await asyncio.sleep((offset - clock) / self.speed)
+            clock = max(clock, offset)
+            yield data
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    # Answers every request with the next recording, round robin, so
+    # stream_response runs its real parser and output path on captured
+    # traffic. Use through openrouter.use_http_client().
+    def __init__(self, recordings, speed=1.0):
+        self.recordings = recordings  # [(meta, chunks)]
+        self.speed = speed
+        self.requests = 0
+
+    async def handle_async_request(self, request):
+        meta, chunks = self.recordings[self.requests % len(self.recordings)]
+        self.requests += 1
+        headers_at = meta.get("headers_at", 0.0)
+        if self.speed and headers_at:
+            await asyncio.sleep(headers_at / self.speed)
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            stream=ReplayStream(chunks, self.speed, headers_at),
+            request=request,
+        )
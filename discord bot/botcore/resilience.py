@@ -0,0 +1,149 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 1.0  # Seconds before the second attempt, doubled after that
+BACKOFF_CAP = 20.0
+MAX_RETRY_AFTER = 20.0  # Longer server-requested waits are reported instead of slept through
+
+BREAKER_THRESHOLD = 5  # Consecutive upstream failures that open the breaker
+BREAKER_COOLDOWN = 30.0  # Seconds the breaker stays open before letting one probe through
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 520, 522, 524, 529}
+
+# Failures of the network path rather than of the request itself
+TRANSPORT_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+
+class APIError(Exception):
+    pass
+
+
+class UpstreamError(APIError):
+    # Non-200 answer from OpenRouter
+    def __init__(self, status_code, body, headers=None):
+        super().__init__(f"API Error {status_code}: {body[:200]}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class CircuitOpenError(APIError):
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} is failing upstream, retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+def is_retryable(error):
+    if isinstance(error, UpstreamError):
+        return error.status_code in RETRYABLE_STATUS
+    return isinstance(error, TRANSPORT_ERRORS)
+
+
+def server_retry_after(headers):
+    # Seconds the server asked us to wait, from Retry-After (seconds or an
+    # HTTP date) or OpenRouter's X-RateLimit-Reset (epoch milliseconds)
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    value = headers.get("x-ratelimit-reset")
+    if value:
+        try:
+            reset = float(value)
+        except ValueError:
+            return None
+        if reset > 1e11:
+            reset /= 1000.0
+        if reset > 1e9:
+            return max(reset - time.time(), 0.0)
+        return max(reset, 0.0)
+    return None
+
+
+def retry_delay(error, attempt):
+    # How long to wait before attempt + 1, or None if it should not be retried
+    if not is_retryable(error):
+        return None
+    if isinstance(error, UpstreamError):
+        requested = server_retry_after(error.headers)
+        if requested is not None:
+            if requested > MAX_RETRY_AFTER:
+                return None
+            return requested + random.uniform(0, 0.5)
+    # Exponential backoff with jitter so many sessions don't retry in lockstep
+    delay = min(BACKOFF_BASE * 2 ** attempt, BACKOFF_CAP)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class CircuitBreaker:
+    # Stops every bot and session in the process from hammering an upstream
+    # that keeps failing. After BREAKER_THRESHOLD consecutive failures calls
+    # fail fast for BREAKER_COOLDOWN seconds; then one probe is let through
+    # and its outcome closes or re-opens the breaker.
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def retry_in(self):
+        # Seconds until calls are let through again, 0 if they are now
+        if self.state != "open":
+            return 0.0
+        return self.cooldown - (time.monotonic() - self.opened_at)
+
+    def check(self):
+        state = self.state
+        if state == "open":
+            raise CircuitOpenError(self.name, self.retry_in())
+        if state == "half-open":
+            if self._probing:
+                raise CircuitOpenError(self.name, 1)
+            self._probing = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self, error):
+        if not is_retryable(error):
+            self._probing = False
+            return  # Our own bad request, not an upstream problem
+        self.failures += 1
+        if self._probing or self.failures >= self.threshold:
+            if self.opened_at is None:
+                print(f"⚡ Circuit open for {self.name} after {self.failures} failures")
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        # The call ended without a verdict (e.g. cancelled)
+        self._probing = False
+
+
+_breakers = {}  # {model: CircuitBreaker}
+
+
+def breaker_for(model):
+    if model not in _breakers:
+        _breakers[model] = CircuitBreaker(model)
+    return _breakers[model]
@@ -0,0 +1,100 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+EXPIRY_CONCURRENCY = 8  # Expired sessions closed in parallel at most
+
+
+class Scheduler:
+    # Background jobs for every persona in the process run from one scheduler.
+    # Besides fixed-interval jobs it keeps a deadline heap for session expiry,
+    # so a single task sleeps exactly until the next session is due.
+    def __init__(self):
+        self._jobs = []  # [(interval_seconds, job)]
+        self._tasks = set()
+        self._running = False
+
+        self._deadlines = {}  # {key: (deadline, callback)}
+        self._heap = []  # [(deadline, seq, key)], may hold stale entries
+        self._seq = itertools.count()
+        self._wakeup = None  # Created in start(), inside the running loop
+        self._expiry_slots = None
+
+    def every(self, interval, job):
+        self._jobs.append((interval, job))
+        if self._running:
+            self.spawn(self._repeat(interval, job))
+
+    def expire_after(self, key, delay, callback):
+        # (Re)arm key to run callback() after delay seconds. Pushing back an
+        # existing deadline is O(1): the old heap entry is re-queued lazily
+        # when it comes up, instead of being searched for and moved now.
+        deadline = time.monotonic() + delay
+        current = self._deadlines.get(key)
+        self._deadlines[key] = (deadline, callback)
+        if current is None or deadline < current[0]:
+            heapq.heappush(self._heap, (deadline, next(self._seq), key))
+            if self._wakeup is not None and self._heap[0][2] == key:
+                self._wakeup.set()
+
+    def cancel_expiry(self, key):
+        self._deadlines.pop(key, None)
+
+    def spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def start(self):
+        self._running = True
+        self._wakeup = asyncio.Event()
+        self._expiry_slots = asyncio.Semaphore(EXPIRY_CONCURRENCY)
+        self.spawn(self._run_expiry())
+        for interval, job in self._jobs:
+            self.spawn(self._repeat(interval, job))
+
+    async def stop(self):
+        self._running = False
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _repeat(self, interval, job):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await job()
+            except Exception as e:
+                print(f"Scheduled job {getattr(job, '__qualname__', job)} failed: {type(e).__name__}: {e}")
+
+    async def _run_expiry(self):
+        while True:
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                deadline, _, key = heapq.heappop(self._heap)
+                entry = self._deadlines.get(key)
+                if entry is None:
+                    continue  # Cancelled
+                if entry[0] > deadline:
+                    # Activity moved the deadline since this entry was queued
+                    heapq.heappush(self._heap, (entry[0], next(self._seq), key))
+                    continue
+                del self._deadlines[key]
+                self.spawn(self._expire(entry[1]))
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _expire(self, callback):
+        async with self._expiry_slots:
+            try:
+                await callback()
+            except Exception as e:
+                print(f"Session expiry failed: {type(e).__name__}: {e}")
@@ -0,0 +1,159 @@
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+BATCH_INTERVAL = 0.5  # Seconds to gather writes before committing them together
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    persona TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    opened_at REAL NOT NULL,
+    last_active REAL NOT NULL,
+    summary TEXT,
+    summarized INTEGER NOT NULL DEFAULT 0,
+    mode TEXT,
+    PRIMARY KEY (persona, user_id)
+);
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    persona TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_by_session ON turns (persona, user_id, id);
+"""
+
+
+class SessionDB:
+    # Durable copy of every open session: one row per session plus one
+    # append-only row per turn, in SQLite WAL mode. Callers only queue writes;
+    # a background writer commits them in batches on a dedicated thread, so
+    # persistence never blocks on_message.
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-db")
+        self._pending = []  # [(sql, params)]
+        self._touches = {}  # {(persona, user_id): last_active}, coalesced per batch
+        self._wakeup = None
+        self._writer = None
+
+    async def start(self):
+        await self._run(self._connect)
+        self._wakeup = asyncio.Event()
+        self._writer = asyncio.get_running_loop().create_task(self._write_behind())
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        await self.flush()
+        await self._run(self._conn.close)
+        self._executor.shutdown(wait=True)
+
+    # Queued writes
+
+    def open_session(self, persona, user_id, channel_id, opened_at, mode=None):
+        self._queue(
+            "INSERT OR REPLACE INTO sessions (persona, user_id, channel_id, opened_at, last_active, mode) VALUES (?, ?, ?, ?, ?, ?)",
+            (persona, user_id, channel_id, opened_at, opened_at, mode),
+        )
+
+    def append_turn(self, persona, user_id, role, content, created_at):
+        self._queue(
+            "INSERT INTO turns (persona, user_id, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+            (persona, user_id, role, content, created_at),
+        )
+
+    def touch(self, persona, user_id, last_active):
+        self._touches[(persona, user_id)] = last_active
+        self._wake()
+
+    def save_summary(self, persona, user_id, summary, summarized):
+        self._queue(
+            "UPDATE sessions SET summary = ?, summarized = ? WHERE persona = ? AND user_id = ?",
+            (summary, summarized, persona, user_id),
+        )
+
+    def close_session(self, persona, user_id):
+        self._touches.pop((persona, user_id), None)
+        self._queue("DELETE FROM sessions WHERE persona = ? AND user_id = ?", (persona, user_id))
+        self._queue("DELETE FROM turns WHERE persona = ? AND user_id = ?", (persona, user_id))
+
+    async def flush(self):
+        if not self._pending and not self._touches:
+            return
+        ops, self._pending = self._pending, []
+        touches, self._touches = self._touches, {}
+        ops.extend(
+            ("UPDATE sessions SET last_active = ? WHERE persona = ? AND user_id = ?", (ts, persona, user_id))
+            for (persona, user_id), ts in touches.items()
+        )
+        await self._run(self._write_batch, ops)
+
+    # Reads
+
+    async def load_open_sessions(self, persona):
+        return await self._run(
+            self._fetch,
+            "SELECT user_id, channel_id, last_active, mode FROM sessions WHERE persona = ?",
+            (persona,),
+        )
+
+    async def load_turns(self, persona, user_id):
+        rows = await self._run(
+            self._fetch,
+            "SELECT role, content FROM turns WHERE persona = ? AND user_id = ? ORDER BY id",
+            (persona, user_id),
+        )
+        return [{"role": role, "content": content} for role, content in rows]
+
+    async def load_summary(self, persona, user_id):
+        rows = await self._run(
+            self._fetch,
+            "SELECT summary, summarized FROM sessions WHERE persona = ? AND user_id = ?",
+            (persona, user_id),
+        )
+        return rows[0] if rows else (None, 0)
+
+    # Internals
+
+    def _queue(self, sql, params):
+        self._pending.append((sql, params))
+        self._wake()
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _write_behind(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(BATCH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except sqlite3.Error as e:
+                print(f"Session DB write failed: {e}")
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def _write_batch(self, ops):
+        with self._conn:
+            for sql, params in ops:
+                self._conn.execute(sql, params)
+
+    def _fetch(self, sql, params):
+        return self._conn.execute(sql, params).fetchall()
@@ -0,0 +1,170 @@
+import asyncio
+from datetime import datetime, timezone
+
+
+class Session:
+    # Created and dropped with the session, so activity is only ever tracked
+    # for users who actually opened one. __slots__ keeps each one small.
+    __slots__ = (
+        "user_id", "channel_id", "mode", "context", "last_active",
+        "summary", "summarized", "summary_task", "pending", "pending_at", "turn_task", "generation",
+    )
+
+    def __init__(self, user_id, channel_id, context, mode=None):
+        self.user_id = user_id
+        self.channel_id = channel_id
+        self.mode = mode  # SESSION_MODES command the session was opened with
+        self.context = context  # conversation_history sent to OpenRouter
+        self.last_active = datetime.now(timezone.utc)
+        self.summary = None  # Running summary of the oldest turns
+        self.summarized = 0  # How many turns after the system prompt it covers
+        self.summary_task = None
+        self.pending = []  # Owner messages not yet answered, merged into the next turn
+        self.pending_at = 0.0  # time.monotonic() of the newest one
+        self.turn_task = None  # Task answering this session's turns one at a time
+        self.generation = None  # Task streaming the current reply, cancelled by !stop
+
+    def unsummarized_turns(self):
+        return self.context[1 + self.summarized:]
+
+    def touch(self):
+        self.last_active = datetime.now(timezone.utc)
+
+
+class SessionRegistry:
+    # Active sessions for one persona, indexed both by owner and by channel so
+    # on_message can tell whether a channel belongs to a session in O(1).
+    # With a SessionDB attached, every change is also queued for persistence,
+    # and sessions left open by a previous run come back as dormant entries:
+    # just the owner and channel, with history loaded when the owner speaks.
+    def __init__(self, name, db=None):
+        self.name = name
+        self.db = db
+        self._by_user = {}  # {user_id: Session}
+        self._by_channel = {}  # {channel_id: Session}
+        self._dormant = {}  # {user_id: (channel_id, mode)}
+        self._restoring = {}  # {user_id: asyncio.Task}
+
+    def open(self, user_id, channel_id, context, mode=None):
+        session = Session(user_id, channel_id, context, mode)
+        self._by_user[user_id] = session
+        self._by_channel[channel_id] = session
+        if self.db is not None:
+            self.db.open_session(self.name, user_id, channel_id, session.last_active.timestamp(), mode)
+        return session
+
+    def append(self, session, role, content):
+        session.context.append({"role": role, "content": content})
+        if self.db is not None:
+            self.db.append_turn(self.name, session.user_id, role, content, datetime.now(timezone.utc).timestamp())
+
+    def save_summary(self, session, summary, covered):
+        session.summary = summary
+        session.summarized += covered
+        if self.db is not None:
+            self.db.save_summary(self.name, session.user_id, summary, session.summarized)
+
+    def touch(self, session):
+        session.touch()
+        if self.db is not None:
+            self.db.touch(self.name, session.user_id, session.last_active.timestamp())
+
+    def close(self, user_id):
+        session = self._by_user.pop(user_id, None)
+        if session is not None:
+            self._by_channel.pop(session.channel_id, None)
+        dormant = self._dormant.pop(user_id, None)
+        if self.db is not None and (session is not None or dormant is not None):
+            self.db.close_session(self.name, user_id)
+        return session
+
+    def by_user(self, user_id):
+        return self._by_user.get(user_id)
+
+    def by_channel(self, channel_id):
+        return self._by_channel.get(channel_id)
+
+    def channel_of(self, user_id):
+        session = self._by_user.get(user_id)
+        if session is not None:
+            return session.channel_id
+        dormant = self._dormant.get(user_id)
+        return dormant[0] if dormant is not None else None
+
+    def mode_of(self, user_id):
+        session = self._by_user.get(user_id)
+        if session is not None:
+            return session.mode
+        dormant = self._dormant.get(user_id)
+        return dormant[1] if dormant is not None else None
+
+    def is_dormant(self, user_id):
+        return user_id in self._dormant
+
+    async def load_dormant(self):
+        # Returns [(user_id, last_active)] so the caller can re-arm expiry
+        if self.db is None:
+            return []
+        rows = await self.db.load_open_sessions(self.name)
+        for user_id, channel_id, _, mode in rows:
+            self._dormant[user_id] = (channel_id, mode)
+        return [(user_id, datetime.fromtimestamp(ts, timezone.utc)) for user_id, _, ts, _ in rows]
+
+    async def restore(self, user_id, system_message):
+        # Concurrent messages from the same owner share one load
+        if user_id not in self._restoring:
+            self._restoring[user_id] = asyncio.get_running_loop().create_task(self._restore(user_id, system_message))
+        try:
+            return await asyncio.shield(self._restoring[user_id])
+        finally:
+            self._restoring.pop(user_id, None)
+
+    async def _restore(self, user_id, system_message):
+        dormant = self._dormant.get(user_id)
+        if dormant is None:
+            return self._by_user.get(user_id)
+        channel_id, mode = dormant
+        turns = await self.db.load_turns(self.name, user_id)
+        summary, summarized = await self.db.load_summary(self.name, user_id)
+        if self._dormant.pop(user_id, None) is None:
+            return self._by_user.get(user_id)  # Closed while loading
+        session = Session(user_id, channel_id, [system_message, *turns], mode)
+        session.summary = summary
+        session.summarized = min(summarized, len(turns))
+        self._by_user[user_id] = session
+        self._by_channel[channel_id] = session
+        return session
+
+    def __contains__(self, user_id):
+        return user_id in self._by_user or user_id in self._dormant
+
+    def __len__(self):
+        return len(self._by_user) + len(self._dormant)
+
+    def __iter__(self):
+        return iter(list(self._by_user.values()))
+
+
+class SessionStore:
+    # One store per process. Each persona gets its own registry, so the same
+    # user can hold a Dominus and a Vox session at the same time. All of them
+    # share one SessionDB when persistence is enabled.
+    def __init__(self, db=None):
+        self.db = db
+        self._personas = {}
+
+    def for_persona(self, name):
+        if name not in self._personas:
+            self._personas[name] = SessionRegistry(name, self.db)
+        return self._personas[name]
+
+    async def start(self):
+        if self.db is not None:
+            await self.db.start()
+
+    async def close(self):
+        if self.db is not None:
+            await self.db.close()
+
+    def __iter__(self):
+        return iter(self._personas.values())
@@ -0,0 +1,14 @@
+import asyncio
+import signal
+
+
+def install_signal_handlers(stop_event):
+    # SIGINT and SIGTERM (how runall stops and restarts bots) set stop_event,
+    # so shutdown runs its cleanup instead of the process dying mid-write
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows: no loop signal handlers, fall back to the plain handler
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop_event.set))
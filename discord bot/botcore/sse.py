@@ -0,0 +1,173 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fast path: orjson parses the raw bytes directly; json.loads accepts bytes too
+loads = orjson.loads if orjson is not None else json.loads
+
+DONE = b"[DONE]"
+SENTENCE_ENDS = ".!?"
+
+
+class SSEParser:
+    # Incremental server-sent-events parser working on raw bytes as they come
+    # off the socket. Lines may end in \n, \r\n or \r and may be split across
+    # chunks; "data:" is accepted with or without the space, several data
+    # lines in one event are joined with \n, and comment lines (":" keep-alives
+    # such as OpenRouter's ": OPENROUTER PROCESSING") are skipped. Payloads
+    # stay bytes until the JSON decoder sees them.
+    def __init__(self):
+        self._buffer = b""
+        self._data = []  # data lines of the event being read
+        self._pending_cr = False
+
+    def feed(self, chunk):
+        # Returns the payloads of every event completed by this chunk
+        buffer = self._buffer + chunk if self._buffer else chunk
+        if self._pending_cr or b"\r" in buffer:
+            buffer = self._normalize_newlines(buffer)
+        lines = buffer.split(b"\n")
+        self._buffer = lines.pop()  # Partial line, completed by a later chunk
+
+        events = []
+        data = self._data
+        for line in lines:
+            if not line:
+                if data:
+                    events.append(data[0] if len(data) == 1 else b"\n".join(data))
+                    data = []
+            elif line[:5] == b"data:":
+                data.append(line[6:] if line[5:6] == b" " else line[5:])
+            # Comments (":...") and other fields (event:, id:, retry:) are ignored
+        self._data = data
+        return events
+
+    def close(self):
+        # Flush an event left unterminated when the stream ended
+        tail = self._buffer
+        self._buffer = b""
+        return self.feed(tail + b"\n\n") if tail or self._data else []
+
+    def _normalize_newlines(self, buffer):
+        # \r\n and lone \r become \n. A \r at the very end already ends its
+        # line; remember it so a \n opening the next chunk is not read as a
+        # second (blank) line.
+        if self._pending_cr and buffer[:1] == b"\n":
+            buffer = buffer[1:]
+        self._pending_cr = buffer[-1:] == b"\r"
+        return buffer.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+
+def delta_content(payload):
+    # Text of one chat.completion.chunk, "" for chunks without content, or
+    # None if the payload is not a usable chunk
+    try:
+        data = loads(payload)
+        content = data["choices"][0]["delta"].get("content")
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return None
+    return content or ""
+
+
+class SentenceSplitter:
+    # Collects streamed tokens and hands back a segment each time one ends a
+    # sentence (". ", "! ", "? ") or a line. Only the token's own tail and the
+    # last character before it are inspected, so every token costs O(len)
+    # rather than re-scanning the buffer; text is kept as a list of parts and
+    # joined once.
+    def __init__(self):
+        self._parts = []  # Every token, for the full reply
+        self._segment = []  # Tokens since the last boundary
+        self._last = ""  # Last character seen
+
+    def feed(self, token):
+        if not token:
+            return None
+        self._parts.append(token)
+        self._segment.append(token)
+        previous = token[-2] if len(token) > 1 else self._last
+        self._last = token[-1]
+        if self._last == "\n" or (self._last == " " and previous and previous in SENTENCE_ENDS):
+            segment = "".join(self._segment)
+            self._segment = []
+            return segment
+        return None
+
+    def rest(self):
+        # Whatever is left after the last boundary
+        segment = "".join(self._segment)
+        self._segment = []
+        return segment
+
+    def text(self):
+        return "".join(self._parts)
+
+
+class ResumeFilter:
+    # Sits between a resumed completion and the splitter. The retry asks the
+    # model to continue `delivered`, but some models restart the answer from
+    # the top or repeat its last few words first; that text was already read
+    # (and posted), so it is dropped here. The first `window` characters are
+    # held back to decide which case applies.
+    def __init__(self, delivered, window=400, min_overlap=8):
+        self.delivered = delivered
+        self.window = min(len(delivered), window)
+        self.min_overlap = min_overlap
+        self.dropped = 0  # Characters discarded as repeats
+        self._held = []
+        self._held_len = 0
+        self._replay = None  # Position in delivered while skipping a restart
+        self._passing = not delivered
+
+    def feed(self, token):
+        if not token or self._passing:
+            return token
+        if self._replay is not None:
+            return self._skip_replay(token)
+        self._held.append(token)
+        self._held_len += len(token)
+        if self._held_len < self.window:
+            return ""
+        return self._decide()
+
+    def flush(self):
+        # End of stream: release whatever is still held
+        if self._passing or self._replay is not None:
+            return ""
+        return self._decide()
+
+    def _decide(self):
+        text = "".join(self._held)
+        self._held = []
+        self._passing = True
+        delivered = self.delivered
+
+        # Restarted from the top: skip for as long as it keeps matching
+        if text[:self.window] == delivered[:self.window] and self.window >= self.min_overlap:
+            self._passing = False
+            self._replay = 0
+            return self._skip_replay(text)
+
+        # Repeated the tail of what was delivered before continuing
+        for k in range(min(len(text), len(delivered)), self.min_overlap - 1, -1):
+            if delivered.endswith(text[:k]):
+                self.dropped += k
+                return text[k:]
+        return text
+
+    def _skip_replay(self, token):
+        pos = self._replay
+        matched = 0
+        limit = min(len(token), len(self.delivered) - pos)
+        while matched < limit and token[matched] == self.delivered[pos + matched]:
+            matched += 1
+        self._replay = pos + matched
+        self.dropped += matched
+        if matched == len(token) and self._replay < len(self.delivered):
+            return ""
+        self._replay = None
+        self._passing = True
+        return token[matched:]
@@ -0,0 +1,138 @@
+import discord
+
+from botcore.capacity import CapacityTimeout, guild_capacity
+from botcore.channel_pool import ChannelPool
+from botcore.discord_output import QueueNotice
+from botcore.metrics import incr
+
+# Where a session's conversation happens. Each session mode picks one with
+# "surface" in SESSION_MODES:
+#
+#   "channel"  a private text channel per session (the default)
+#   "thread"   a private thread under the mode's allowed channel, which keeps
+#              the guild's channel list and its 500-channel cap out of it and
+#              avoids the guild-wide channel-create rate limit
+#
+# Session channels are spread over "<persona> sessions" categories and
+# admitted by the guild's GuildCapacity, so near the channel cap a new
+# session waits in line instead of failing.
+#
+# Both honour the mode's slowmode_delay, and both are deleted when the
+# session closes or expires. A surface needs open(lobby, user, mode_config),
+# returning the channel or thread (None on failure, after telling the user),
+# and close(channel).
+DEFAULT_SURFACE = "channel"
+THREAD_ARCHIVE_MINUTES = 1440  # Well past INACTIVITY_LIMIT, so sessions expire before Discord archives them
+CAPACITY_NOTICE = "⏳ This server is at its channel limit. You're #{position} in line for a {name} session."
+
+
+class ChannelSurface:
+    def __init__(self, persona, scheduler):
+        self.persona = persona
+        self.pool = ChannelPool(persona.name, scheduler)
+
+    def prefill(self, lobby, mode_config):
+        self.pool.refill(lobby.guild, mode_config.get("slowmode_delay", 0))
+
+    async def open(self, lobby, user, mode_config):
+        guild = lobby.guild
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+        }
+
+        suffix = mode_config.get("channel_suffix", "")
+        slowmode = mode_config.get("slowmode_delay", 0)
+        name = self.persona.name
+        fields = dict(
+            name=self.persona.channel_name.format(display_name=user.display_name, suffix=suffix),
+            overwrites=overwrites,
+            topic=f"{name} session for {user.display_name} ({mode_config['type_label']})",
+            reason=f"{name} private chat"
+        )
+
+        # A standby channel already has the slowmode; claiming it is one edit
+        channel = self.pool.take(guild, slowmode)
+        if channel is not None:
+            try:
+                await channel.edit(**fields)
+                return channel
+            except discord.NotFound:
+                pass  # Deleted by hand since it was pooled
+            except discord.HTTPException as e:
+                incr("discord_channel_errors", persona=name, action="claim", status=e.status)
+                print(f"Standby channel claim failed: {e}")
+
+        notice = QueueNotice(lobby, name, CAPACITY_NOTICE)
+        self.pool.cold_creates += 1
+        try:
+            async with guild_capacity(guild).admit(guild, name, on_wait=notice.update) as category:
+                await notice.clear()
+                channel = await guild.create_text_channel(category=category, slowmode_delay=slowmode, **fields)
+            incr("discord_channels_created", persona=name)
+            return channel
+        except CapacityTimeout:
+            await lobby.send(f"❌ {user.mention} this server has no room for another session right now. Please try again later.")
+            return None
+        except discord.HTTPException as e:
+            incr("discord_channel_errors", persona=name, action="create", status=e.status)
+            print(f"Channel creation failed: {e}")
+            await lobby.send(f"❌ Failed to create channel: {e}")
+            return None
+        finally:
+            self.pool.cold_creates -= 1
+            await notice.clear()
+
+    async def close(self, channel):
+        await channel.delete()
+        incr("discord_channels_deleted", persona=self.persona.name)
+        guild_capacity(channel.guild).notify()
+
+
+class ThreadSurface:
+    def __init__(self, persona, scheduler):
+        self.persona = persona
+
+    def prefill(self, lobby, mode_config):
+        pass  # Threads are cheap to create; nothing to keep warm
+
+    async def open(self, lobby, user, mode_config):
+        suffix = mode_config.get("channel_suffix", "")
+        name = self.persona.name
+        try:
+            thread = await lobby.create_thread(
+                name=self.persona.channel_name.format(display_name=user.display_name, suffix=suffix),
+                type=discord.ChannelType.private_thread,
+                invitable=False,
+                auto_archive_duration=THREAD_ARCHIVE_MINUTES,
+                slowmode_delay=mode_config.get("slowmode_delay", 0),
+                reason=f"{name} private chat"
+            )
+        except discord.HTTPException as e:
+            incr("discord_channel_errors", persona=name, action="create_thread", status=e.status)
+            print(f"Thread creation failed: {e}")
+            await lobby.send(f"❌ Failed to create thread: {e}")
+            return None
+        incr("discord_threads_created", persona=name)
+
+        try:
+            await thread.add_user(user)
+        except discord.HTTPException as e:
+            incr("discord_channel_errors", persona=name, action="add_thread_member", status=e.status)
+            print(f"Adding user to thread failed: {e}")
+            # A private thread its owner can't see is no use; don't leave it behind
+            try:
+                await self.close(thread)
+            except discord.HTTPException as error:
+                print(f"Error deleting thread: {error}")
+            await lobby.send(f"❌ {user.mention} could not be added to the session thread: {e}")
+            return None
+        return thread
+
+    async def close(self, thread):
+        await thread.delete()
+        incr("discord_threads_deleted", persona=self.persona.name)
+
+
+SURFACES = {"channel": ChannelSurface, "thread": ThreadSurface}
@@ -0,0 +1,11 @@
+MESSAGE_OVERHEAD = 4  # Role and separator tokens per chat message
+
+
+def estimate_tokens(text):
+    # Roughly 4 characters per token for English text. Cheap enough to run on
+    # every message of every turn, and close enough to budget with.
+    return (len(text) + 3) // 4
+
+
+def message_tokens(message):
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD
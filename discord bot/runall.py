@@ -1,65 +1,208 @@
-import subprocess
+import asyncio
+import logging
+import logging.handlers
 import os
+import queue
 import sys
 import time
 
+from botcore.metrics import incr, render, set_gauge
+from botcore.metrics_server import aggregate, scrape, start_metrics_server
+from botcore.signals import install_signal_handlers
+
 # Get root directory (where this script is located)
 root_dir = os.path.dirname(os.path.abspath(__file__))
 
-print(f"Root directory: {root_dir}")
-
 # List of bot folders
-bot_folders = ["lux", "dominus", "vox","seraph","vitalis","stratos"]
+bot_folders = ["Lux", "Dominus", "Vox", "Seraph", "Vitalis", "Stratos"]
+
+# Log rotation (one <bot>.log per bot next to this script)
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+PIPE_LINE_LIMIT = 1024 * 1024  # Longest single line read from a bot's output
+
+# Restart policy
+RESTART_BASE_DELAY = 1.0
+RESTART_MAX_DELAY = 60.0
+STABLE_UPTIME = 60.0  # A bot that stayed up this long gets its backoff reset
+SHUTDOWN_TIMEOUT = 10.0
+
+# Metrics: every bot serves its own endpoint on METRICS_PORT + 1, + 2, ...
+# and this supervisor serves all of them merged on METRICS_PORT (0 = off)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9300") or 0)
 
-processes = []
 
-# Launch each bot
-for folder in bot_folders:
+def setup_bot_loggers(folders):
+    # File writes happen on a QueueListener thread so a slow disk never
+    # stalls the loop that is draining the bots' pipes.
+    log_queue = queue.SimpleQueue()
+    handlers = []
+    loggers = {}
+    for folder in folders:
+        handler = logging.handlers.RotatingFileHandler(
+            os.path.join(root_dir, f"{folder.lower()}.log"),
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT,
+            encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        handler.addFilter(lambda record, name=folder: record.name == f"bots.{name}")
+        handlers.append(handler)
+
+        logger = logging.getLogger(f"bots.{folder}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        loggers[folder] = logger
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=False)
+    listener.start()
+    return loggers, listener
+
+
+async def drain_output(stream, logger):
+    # Read continuously so the child never blocks on a full pipe. A line over
+    # PIPE_LINE_LIMIT (a huge traceback or payload dump) is logged in pieces
+    # rather than ending the loop and leaving the pipe to fill up.
+    while True:
+        try:
+            line = await stream.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            line = e.partial  # Last line without a newline, or b"" at EOF
+        except asyncio.LimitOverrunError as e:
+            line = await stream.read(e.consumed or PIPE_LINE_LIMIT)
+        if not line:
+            break
+        logger.info(line.decode("utf-8", errors="replace").rstrip())
+
+
+def metrics_port(folder):
+    return METRICS_PORT + 1 + bot_folders.index(folder) if METRICS_PORT else 0
+
+
+async def aggregate_metrics():
+    # One scrape of every running bot, each sample tagged with bot="<folder>"
+    folders = list(bot_folders)
+    results = await asyncio.gather(*(scrape(port=metrics_port(f)) for f in folders), return_exceptions=True)
+    expositions = {}
+    for folder, result in zip(folders, results):
+        set_gauge("bot_up", 0 if isinstance(result, BaseException) else 1, bot=folder)
+        if not isinstance(result, BaseException):
+            expositions[folder] = result
+    expositions["runall"] = render()
+    return aggregate(expositions)
+
+
+async def supervise(folder, logger, stop_event, running):
     bot_path = os.path.join(root_dir, folder)
     main_script = os.path.join(bot_path, "main.py")
 
     # Check if the main.py exists
     if not os.path.isfile(main_script):
         print(f"❌ Error: {main_script} does not exist!")
-        continue
-
-    print(f"🚀 Launching bot from: {bot_path}")
+        return
 
-    # Use sys.executable to use the same Python that ran this script
-    proc = subprocess.Popen(
-        [sys.executable, "main.py"],
-        cwd=bot_path,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
+    env = dict(os.environ, PYTHONUNBUFFERED="1", METRICS_PORT=str(metrics_port(folder)))
+    env.pop("METRICS_SOCKET", None)
+    delay = RESTART_BASE_DELAY
 
-    processes.append((folder, proc))
-
-# Wait a moment to see if any fail immediately
-time.sleep(2)
-
-# Check status of all launched processes
-for folder, proc in processes:
-    if proc.poll() is not None:
-        # Process exited early
-        stdout, stderr = proc.communicate()
-        print(f"\n⚠️ Bot '{folder}' exited with code {proc.returncode}")
-        print("STDOUT:")
-        print(stdout)
-        print("STDERR:")
-        print(stderr)
-    else:
+    while not stop_event.is_set():
+        print(f"🚀 Launching bot from: {bot_path}")
+        # Use sys.executable to use the same Python that ran this script
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "main.py",
+            cwd=bot_path,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=PIPE_LINE_LIMIT,
+        )
+        running[folder] = proc
+        if stop_event.is_set():
+            proc.terminate()
+        started = time.monotonic()
         print(f"✅ Bot '{folder}' is running (PID: {proc.pid})")
+        logger.info(f"--- started (PID {proc.pid}) ---")
 
-# Keep the launcher alive so you can see output or handle Ctrl+C
-try:
-    while True:
-        time.sleep(1)
-except KeyboardInterrupt:
+        await drain_output(proc.stdout, logger)
+        returncode = await proc.wait()
+        running.pop(folder, None)
+        logger.info(f"--- exited with code {returncode} ---")
+
+        if stop_event.is_set():
+            break
+
+        incr("bot_restarts", bot=folder)
+        if time.monotonic() - started >= STABLE_UPTIME:
+            delay = RESTART_BASE_DELAY
+        print(f"⚠️ Bot '{folder}' exited with code {returncode}, restarting in {delay:.0f}s")
+
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        delay = min(delay * 2, RESTART_MAX_DELAY)
+
+
+async def shutdown(running):
     print("\n🛑 Shutting down all bots...")
-    for _, proc in processes:
-        proc.terminate()
-    for _, proc in processes:
-        proc.wait()
-    print("All bots terminated.")
\ No newline at end of file
+    procs = list(running.values())
+    for proc in procs:
+        if proc.returncode is None:
+            proc.terminate()
+    try:
+        await asyncio.wait_for(asyncio.gather(*(proc.wait() for proc in procs)), timeout=SHUTDOWN_TIMEOUT)
+    except asyncio.TimeoutError:
+        for proc in procs:
+            if proc.returncode is None:
+                proc.kill()
+        await asyncio.gather(*(proc.wait() for proc in procs))
+    print("All bots terminated.")
+
+
+async def run_supervisor():
+    print(f"Root directory: {root_dir}")
+
+    loggers, listener = setup_bot_loggers(bot_folders)
+    stop_event = asyncio.Event()
+    install_signal_handlers(stop_event)
+
+    metrics_server = None
+    if METRICS_PORT:
+        metrics_server = await start_metrics_server(aggregate_metrics, port=METRICS_PORT)
+
+    running = {}
+    tasks = [
+        asyncio.create_task(supervise(folder, loggers[folder], stop_event, running))
+        for folder in bot_folders
+    ]
+    try:
+        await stop_event.wait()
+        await shutdown(running)
+        await asyncio.gather(*tasks)
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        listener.stop()
+
+
+async def run_host_mode():
+    # `python runall.py --host`: every persona as a plugin in this process
+    from botcore.host import run_host
+
+    stop_event = asyncio.Event()
+    install_signal_handlers(stop_event)
+    # One process, so its own endpoint already covers every persona
+    os.environ.setdefault("METRICS_PORT", str(METRICS_PORT))
+    await run_host(
+        [os.path.join(root_dir, folder) for folder in bot_folders],
+        os.path.join(root_dir, "memory.db"),
+        stop_event,
+    )
+
+
+if __name__ == "__main__":
+    if "--host" in sys.argv[1:]:
+        asyncio.run(run_host_mode())
+    else:
+        asyncio.run(run_supervisor())
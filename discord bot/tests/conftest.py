@@ -0,0 +1,101 @@
+import asyncio
+import copy
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+sys.path.insert(0, os.path.join(root_dir, "bench"))
+
+from fake_discord import FakeDiscord, FakeGuild, FakeMessage, FakeUser
+
+from botcore import discord_output, openrouter
+from botcore import persona as persona_module
+from botcore.host import load_persona
+from botcore.persona import PersonaBot
+from botcore.scheduler import Scheduler
+from botcore.sessions import SessionStore
+
+
+def sse_event(token):
+    return f"data: {json.dumps({'choices': [{'delta': {'content': token}}]})}\n\n".encode()
+
+
+class TokenStream(httpx.AsyncByteStream):
+    # An OpenRouter reply, one token per chunk, `delay` seconds apart
+    def __init__(self, tokens, delay=0.0):
+        self.tokens = tokens
+        self.delay = delay
+
+    async def __aiter__(self):
+        for token in self.tokens:
+            yield sse_event(token)
+            if self.delay:
+                await asyncio.sleep(self.delay)
+        yield b"data: [DONE]\n\n"
+
+
+class Harness:
+    # One persona on a fake guild, with OpenRouter answered by `tokens`.
+    # Use inside the test's event loop: `async with Harness(...) as h:`.
+    # `surface` overrides the session mode's surface ("channel" or "thread").
+    def __init__(self, tokens=("Hello there. ", "How are you?"), delay=0.0, folder="Dominus", surface=None):
+        self.tokens = list(tokens)
+        self.delay = delay
+        self.folder = folder
+        self.surface = surface
+        self.requests = []  # JSON bodies sent to OpenRouter
+
+    def handle(self, request):
+        self.requests.append(json.loads(request.content))
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=TokenStream(self.tokens, self.delay))
+
+    async def __aenter__(self):
+        openrouter.use_http_client(httpx.AsyncClient(transport=httpx.MockTransport(self.handle)))
+        self.api = FakeDiscord(latency=0)
+        self.guild = FakeGuild(self.api)
+        self.scheduler = Scheduler()
+        self.scheduler.start()
+        persona = load_persona(os.path.join(root_dir, self.folder))
+        if self.surface is not None:
+            persona = copy.copy(persona)
+            persona.session_modes = {
+                command: dict(config, surface=self.surface) for command, config in persona.session_modes.items()
+            }
+        self.bot = PersonaBot(persona, "fake-token", "fake-key", SessionStore().for_persona(persona.name), self.scheduler)
+        self.bot.client.get_channel = self.guild.get_channel
+        self.command, config = next(iter(persona.session_modes.items()))
+        self.lobby = self.guild.add_channel("lobby", config["allowed_channel_id"])
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.scheduler.stop()
+        await openrouter.close_http_client()
+        return False
+
+    async def open(self, user_id=1):
+        # Open a session; returns (user, session, channel)
+        user = FakeUser(self.api, user_id)
+        await self.bot.on_message(FakeMessage(self.lobby, user, self.command))
+        session = self.bot.sessions.by_user(user_id)
+        return user, session, self.guild.get_channel(session.channel_id)
+
+    async def say(self, user, channel, text):
+        await self.bot.on_message(FakeMessage(channel, user, text))
+
+
+@pytest.fixture
+def harness(monkeypatch):
+    monkeypatch.setenv("CHANNEL_POOL_SIZE", "0")
+    monkeypatch.setattr(persona_module, "TURN_DEBOUNCE", 0.05)
+    return Harness
+
+
+@pytest.fixture(autouse=True)
+def fresh_send_budgets(monkeypatch):
+    # Every FakeDiscord hands out the same channel ids; don't share budgets between tests
+    monkeypatch.setattr(discord_output, "_channel_budgets", {})
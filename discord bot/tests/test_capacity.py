@@ -0,0 +1,92 @@
+import asyncio
+
+from fake_discord import FakeDiscord, FakeGuild
+
+from botcore import capacity
+from botcore.channel_pool import ChannelPool
+from botcore.scheduler import Scheduler
+
+
+def fresh_capacity(monkeypatch, limit, headroom=0, timeout=2):
+    monkeypatch.setattr(capacity, "GUILD_CHANNEL_LIMIT", limit)
+    monkeypatch.setattr(capacity, "_capacities", {})
+    monkeypatch.setenv("GUILD_CHANNEL_HEADROOM", str(headroom))
+    monkeypatch.setenv("CHANNEL_WAIT_TIMEOUT", str(timeout))
+
+
+def test_sessions_spread_over_categories(monkeypatch):
+    fresh_capacity(monkeypatch, limit=100)
+    monkeypatch.setattr(capacity, "CATEGORY_CHANNEL_LIMIT", 2)
+
+    async def main():
+        guild = FakeGuild(FakeDiscord(latency=0))
+        for _ in range(5):
+            async with capacity.guild_capacity(guild).admit(guild, "LUX") as category:
+                channel = await guild.create_text_channel("s", category=category)
+        names = sorted(c.name for c in guild.categories)
+        assert names == ["LUX sessions", "LUX sessions 2", "LUX sessions 3"]
+        assert all(len(c.channels) <= 2 for c in guild.categories)
+
+    asyncio.run(main())
+
+
+def test_full_guild_queues_then_admits_after_delete(monkeypatch):
+    # general + category + 2 sessions = 4; room for two more would be 6
+    fresh_capacity(monkeypatch, limit=5)
+
+    async def main():
+        guild = FakeGuild(FakeDiscord(latency=0))
+        gate = capacity.guild_capacity(guild)
+        sessions = []
+        for _ in range(2):
+            async with gate.admit(guild, "LUX") as category:
+                sessions.append(await guild.create_text_channel("s", category=category))
+        positions = []
+
+        async def late():
+            async with gate.admit(guild, "LUX", on_wait=lambda p: asyncio.sleep(0, positions.append(p))):
+                pass
+
+        waiter = asyncio.create_task(late())
+        await asyncio.sleep(0.05)
+        assert not waiter.done() and gate.waiting == 1 and positions == [1]
+        await sessions[0].delete()
+        gate.notify()
+        await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(main())
+
+
+def test_full_guild_times_out(monkeypatch):
+    fresh_capacity(monkeypatch, limit=2, timeout=0.1)
+
+    async def main():
+        guild = FakeGuild(FakeDiscord(latency=0))
+        try:
+            async with capacity.guild_capacity(guild).admit(guild, "LUX"):
+                raise AssertionError("admitted into a full guild")
+        except capacity.CapacityTimeout:
+            pass
+
+    asyncio.run(main())
+
+
+def test_waiting_session_reclaims_other_personas_standby(monkeypatch):
+    fresh_capacity(monkeypatch, limit=6)
+    monkeypatch.setenv("CHANNEL_POOL_SIZE", "2")
+
+    async def main():
+        guild = FakeGuild(FakeDiscord(latency=0))
+        scheduler = Scheduler()
+        pool = ChannelPool("LUX", scheduler)
+        await pool.fill(guild, 0)  # general, "LUX sessions", 2 standby
+        assert len(pool.ready[(guild.id, 0)]) == 2
+        guild.add_channel("someone-else")  # 5 of 6: no room for a channel and its category
+        gate = capacity.guild_capacity(guild)
+        async with gate.admit(guild, "VOX") as category:
+            await guild.create_text_channel("vox-session", category=category)
+        assert len(pool.ready[(guild.id, 0)]) == 1
+        assert category is not None and category.name == "VOX sessions"
+        assert len(guild.channels) <= 6
+
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+import asyncio
+
+from botcore import completion_queue
+from botcore.completion_queue import CompletionQueue
+
+
+async def hold(queue, lane, started, release, on_wait=None):
+    async with queue.slot(lane, on_wait=on_wait):
+        started.append(lane)
+        await release.wait()
+
+
+def test_higher_lanes_start_first():
+    async def main():
+        queue = CompletionQueue(1)
+        started, release = [], asyncio.Event()
+        first = asyncio.Event()
+
+        async def running():
+            async with queue.slot("free"):
+                await first.wait()
+
+        tasks = [asyncio.create_task(running())]
+        await asyncio.sleep(0)
+        for lane in ["background", "free", "standard", "paid"]:
+            tasks.append(asyncio.create_task(hold(queue, lane, started, release)))
+        await asyncio.sleep(0)
+        assert queue.depth() == 4 and queue.depth("paid") == 1
+        first.set()
+        release.set()
+        await asyncio.gather(*tasks)
+        assert started == ["paid", "standard", "free", "background"]
+        assert queue.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_reserved_slots_are_paid_only():
+    async def main():
+        queue = CompletionQueue(3, reserved=1)
+        started, release = [], asyncio.Event()
+        tasks = [asyncio.create_task(hold(queue, "free", started, release)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert started == ["free", "free"] and queue.depth("free") == 1
+        tasks.append(asyncio.create_task(hold(queue, "paid", started, release)))
+        await asyncio.sleep(0)
+        assert started == ["free", "free", "paid"] and queue.in_flight == 3
+        release.set()
+        await asyncio.gather(*tasks)
+        assert queue.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_reserved_never_takes_every_slot():
+    queue = CompletionQueue(2, reserved=5)
+    assert queue.reserved == 1
+
+
+def test_waiter_sees_its_position_and_can_cancel():
+    async def main():
+        queue = CompletionQueue(1)
+        started, release = [], asyncio.Event()
+        positions = []
+
+        async def seen(position):
+            positions.append(position)
+
+        running = asyncio.create_task(hold(queue, "standard", started, release))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(hold(queue, "free", started, release, on_wait=seen))
+        cancelled = asyncio.create_task(hold(queue, "standard", started, release))
+        await asyncio.sleep(0)
+        assert positions == [1]
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert queue.depth() == 1
+        release.set()
+        await asyncio.gather(running, waiting)
+        assert started == ["standard", "free"] and queue.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_starved_waiter_goes_first(monkeypatch):
+    monkeypatch.setattr(completion_queue, "STARVATION_LIMIT", 0.05)
+
+    async def main():
+        queue = CompletionQueue(1)
+        started, release = [], asyncio.Event()
+        gate = asyncio.Event()
+
+        async def running():
+            async with queue.slot("standard"):
+                await gate.wait()
+
+        first = asyncio.create_task(running())
+        await asyncio.sleep(0)
+        old = asyncio.create_task(hold(queue, "background", started, release))
+        await asyncio.sleep(0.1)
+        new = asyncio.create_task(hold(queue, "paid", started, release))
+        await asyncio.sleep(0)
+        gate.set()
+        release.set()
+        await asyncio.gather(first, old, new)
+        assert started == ["background", "paid"]
+
+    asyncio.run(main())
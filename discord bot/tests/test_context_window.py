@@ -0,0 +1,58 @@
+from botcore import context_window
+from botcore.context_window import fit_to_budget, with_summary
+from botcore.tokens import message_tokens
+
+
+def test_summary_model_is_read_on_use(monkeypatch):
+    monkeypatch.delenv("OPENROUTER_SUMMARY_MODEL", raising=False)
+    assert context_window.summary_model() == context_window.DEFAULT_SUMMARY_MODEL
+    monkeypatch.setenv("OPENROUTER_SUMMARY_MODEL", "vendor/other-model")
+    assert context_window.summary_model() == "vendor/other-model"
+
+
+def turns(count):
+    # Alternating user/assistant turns of 14 estimated tokens each
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i:02d} ".ljust(40, "x")}
+        for i in range(count)
+    ]
+
+
+def head():
+    return with_summary({"role": "system", "content": "You are a coach."}, "They want to run.", [])
+
+
+def test_everything_fits():
+    messages = head() + turns(6)
+    assert fit_to_budget(messages, budget=1000) == (messages, [], 0)
+    assert fit_to_budget([]) == ([], [], 0)
+
+
+def test_system_messages_and_recent_are_kept_over_budget():
+    messages = head() + turns(6)
+    window, dropped, saved = fit_to_budget(messages, budget=1, keep_recent=2)
+    assert window == messages[:2] + messages[-2:]
+    assert dropped == messages[2:-2]
+    assert saved == sum(message_tokens(m) for m in dropped)
+
+
+def test_older_turns_fill_newest_first():
+    messages = head() + turns(8)
+    fixed = sum(message_tokens(m) for m in messages[:2] + messages[-2:])
+    # Room for exactly three of the six older turns
+    window, dropped, saved = fit_to_budget(messages, budget=fixed + 3 * 14 + 5, keep_recent=2)
+    assert window == messages[:2] + messages[-5:]
+    assert dropped == messages[2:-5]  # Oldest first
+    assert [m["content"][:7] for m in dropped] == ["turn 00", "turn 01", "turn 02"]
+    assert saved == 3 * 14 == sum(message_tokens(m) for m in dropped)
+
+
+def test_an_older_turn_that_does_not_fit_stops_the_fill():
+    messages = head() + turns(4)
+    messages[3] = {"role": "assistant", "content": "y" * 400}  # Too big for what is left
+    fixed = sum(message_tokens(m) for m in messages[:2] + messages[-2:])
+    window, dropped, saved = fit_to_budget(messages, budget=fixed + 20, keep_recent=2)
+    # turn 00 would fit on its own, but nothing older than a dropped turn is kept
+    assert window == messages[:2] + messages[-2:]
+    assert dropped == messages[2:4]
+    assert saved == message_tokens(messages[2]) + message_tokens(messages[3])
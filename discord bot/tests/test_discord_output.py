@@ -0,0 +1,189 @@
+import asyncio
+
+from fake_discord import FakeDiscord, FakeGuild
+
+from botcore import discord_output
+from botcore.discord_output import MESSAGE_LIMIT, ChannelSender, EditingSender, RateBudget, markdown_state, split_message
+
+
+def make_channel():
+    return FakeGuild(FakeDiscord(latency=0)).add_channel("session")
+
+
+def test_first_segment_is_not_held():
+    async def main():
+        channel = make_channel()
+        sender = ChannelSender(channel).start()
+        await sender.put("One. ")
+        await asyncio.sleep(0.05)
+        assert channel.messages == ["One."]
+        await sender.put("Two. ")
+        await sender.put("Three. ")
+        await asyncio.sleep(0.05)
+        assert channel.messages == ["One."]  # Later segments wait to be coalesced
+        await sender.close()
+        assert channel.messages == ["One.", "Two. Three."]
+
+    asyncio.run(main())
+
+
+def test_abort_posts_what_was_queued():
+    async def main():
+        channel = make_channel()
+        sender = ChannelSender(channel).start()
+        await sender.put("One. ")
+        await sender.put("Two. ")
+        await sender.put("Three. ")
+        await sender.abort(1.0)
+        assert channel.messages == ["One.", "Two. Three."]
+        assert sender.delivered_text() == "One.\nTwo. Three."
+
+    asyncio.run(main())
+
+
+def test_abort_deletes_unused_placeholder():
+    async def main():
+        channel = make_channel()
+        sender = EditingSender(channel, "thinking...").start()
+        await asyncio.sleep(0)
+        await sender.abort(1.0)
+        assert channel.messages == ["thinking..."]
+        assert channel.calls["delete_message"] == 1
+        assert sender.delivered_text() == ""
+
+    asyncio.run(main())
+
+
+def test_abort_keeps_edited_text():
+    async def main():
+        channel = make_channel()
+        sender = EditingSender(channel, "thinking...").start()
+        await sender.put("Partial answer.")
+        await sender.abort(1.0)
+        assert channel.calls["edit_message"] == 1
+        assert channel.calls["delete_message"] == 0
+        assert sender.delivered_text() == "Partial answer."
+
+    asyncio.run(main())
+
+
+
+def recording(channel):
+    # Keeps every message the sender posts, so edits to them can be read back
+    posted = []
+    send = channel.send
+
+    async def record(content, delete_after=None):
+        message = await send(content, delete_after)
+        posted.append(message)
+        return message
+
+    channel.send = record
+    return posted
+
+
+def edit_budget(channel, capacity, period):
+    # Both of the channel's budgets in place, or creating one evicts the other as idle
+    discord_output._channel_budgets[channel.id] = RateBudget()
+    discord_output._channel_budgets[("edit", channel.id)] = RateBudget(capacity, period)
+
+
+def test_edits_are_throttled_by_interval(monkeypatch):
+    monkeypatch.setattr(discord_output, "EDIT_INTERVAL", 0.1)
+
+    async def main():
+        channel = make_channel()
+        edit_budget(channel, 100, 1.0)  # Only the interval limits edits
+        posted = recording(channel)
+        sender = EditingSender(channel, "thinking...").start()
+        words = [f"word{i} " for i in range(40)]
+        for word in words:
+            await sender.put(word)
+            await asyncio.sleep(0.01)
+        await sender.close()
+        assert sender.sent == 1 and len(posted) == 1
+        assert 3 <= sender.edits <= 7  # About one per 0.1 s, not one per segment
+        assert posted[0].content == "".join(words).strip()
+
+    asyncio.run(main())
+
+
+def test_edits_wait_for_the_edit_budget(monkeypatch):
+    monkeypatch.setattr(discord_output, "EDIT_INTERVAL", 0)
+
+    async def main():
+        channel = make_channel()
+        edit_budget(channel, 1, 0.2)
+        posted = recording(channel)
+        sender = EditingSender(channel, "thinking...").start()
+        for i in range(40):
+            await sender.put(f"word{i} ")
+            await asyncio.sleep(0.01)
+        await sender.close()
+        # One at once, then one per 0.2 s over about 0.45 s, plus the final edit
+        assert 2 <= sender.edits <= 5
+        assert posted[0].content.endswith("word39")
+
+    asyncio.run(main())
+
+
+def test_long_reply_rolls_over_into_balanced_messages():
+    async def main():
+        channel = make_channel()
+        posted = recording(channel)
+        sender = EditingSender(channel, "thinking...").start()
+        parts = ["Here is the script.\n", "```py\n"] + [f"print('line {i}')\n" for i in range(200)] + ["```\n", "Done."]
+        for part in parts:
+            await sender.put(part)
+        await sender.close()
+        contents = [m.content for m in posted]
+        assert len(contents) >= 3 and sender.sent == len(contents)
+        for content in contents:
+            assert len(content) <= MESSAGE_LIMIT
+            in_code, _, in_bold = markdown_state(content)
+            assert not in_code and not in_bold
+        assert contents[1].startswith("```py\n")  # Reopened with its language
+        joined = "\n".join(contents)
+        assert all(f"print('line {i}')" in joined for i in range(200))
+        assert contents[-1].endswith("Done.")
+        assert sender.delivered_text() == joined
+
+    asyncio.run(main())
+
+
+def test_prose_rolls_over_at_a_sentence():
+    async def main():
+        channel = make_channel()
+        posted = recording(channel)
+        sender = EditingSender(channel).start()
+        sentences = [f"Sentence number {i} is here. " for i in range(150)]
+        for sentence in sentences:
+            await sender.put(sentence)
+        await sender.close()
+        contents = [m.content for m in posted]
+        assert len(contents) == 3
+        assert all(len(c) <= MESSAGE_LIMIT and c.endswith("is here.") for c in contents)
+        assert " ".join(contents) == "".join(sentences).strip()
+
+    asyncio.run(main())
+
+
+def test_split_message_prefers_the_last_safe_cut():
+    text = "a" * 10 + "b" * 10 + "c" * 10
+    assert split_message(text, [10, 20, 30], limit=25) == (text[:20], text[20:], True)
+
+
+def test_split_message_closes_and_reopens_a_long_code_block():
+    code = "```py\n" + "\n".join(f"line {i}" for i in range(60)) + "\n```"
+    head, tail, safe = split_message(code, [0, len(code)], limit=100)
+    assert not safe and len(head) <= 100
+    assert head.endswith("\n```") and tail.startswith("```py\n")
+    assert markdown_state(head) == (False, "py", False)
+
+
+def test_split_message_closes_and_reopens_bold():
+    text = "**" + "word " * 50 + "**"
+    head, tail, safe = split_message(text, [len(text)], limit=60)
+    assert not safe and len(head) <= 60
+    assert head.endswith("**") and tail.startswith("**")
+    assert markdown_state(head)[2] is False
@@ -0,0 +1,24 @@
+import asyncio
+
+import httpx
+
+from botcore import openrouter
+
+
+def test_base_url_is_read_on_use(monkeypatch):
+    seen = []
+
+    def handle(request):
+        seen.append(str(request.url))
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    async def main():
+        openrouter.use_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handle)))
+        try:
+            return await openrouter.complete([], api_key="key", model="test/base-url", title="test")
+        finally:
+            await openrouter.close_http_client()
+
+    monkeypatch.setenv("OPENROUTER_BASE_URL", "http://proxy.test/v1")
+    assert asyncio.run(main()) == "ok"
+    assert seen == ["http://proxy.test/v1/chat/completions"]
@@ -0,0 +1,110 @@
+import random
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from botcore import resilience
+from botcore.resilience import CircuitBreaker, CircuitOpenError, UpstreamError, retry_delay, server_retry_after
+
+
+def test_retry_after_in_seconds():
+    assert server_retry_after({"retry-after": "7"}) == 7.0
+    assert server_retry_after({"retry-after": "-3"}) == 0.0
+    assert server_retry_after({}) is None
+
+
+def test_retry_after_as_http_date():
+    value = formatdate(time.time() + 30, usegmt=True)
+    assert 28 <= server_retry_after({"retry-after": value}) <= 30
+    assert server_retry_after({"retry-after": "soon"}) is None
+
+
+def test_ratelimit_reset_in_milliseconds_and_seconds():
+    now = time.time()
+    assert 9 <= server_retry_after({"x-ratelimit-reset": str(int((now + 10) * 1000))}) <= 10
+    assert 9 <= server_retry_after({"x-ratelimit-reset": str(int(now + 10))}) <= 10
+    assert server_retry_after({"x-ratelimit-reset": "4"}) == 4.0  # A delay rather than a time
+    assert server_retry_after({"x-ratelimit-reset": "later"}) is None
+
+
+def test_retry_after_wins_over_ratelimit_reset():
+    assert server_retry_after({"retry-after": "2", "x-ratelimit-reset": "9"}) == 2.0
+
+
+def test_no_retry_for_bad_requests():
+    assert retry_delay(UpstreamError(400, "bad request"), 0) is None
+    assert retry_delay(ValueError("not an API error"), 0) is None
+
+
+def test_no_retry_when_server_asks_for_too_long():
+    error = UpstreamError(429, "slow down", {"retry-after": str(resilience.MAX_RETRY_AFTER + 1)})
+    assert retry_delay(error, 0) is None
+
+
+def test_server_requested_delay_gets_a_little_jitter():
+    error = UpstreamError(429, "slow down", {"retry-after": "3"})
+    for _ in range(50):
+        assert 3.0 <= retry_delay(error, 0) <= 3.5
+
+
+def test_backoff_stays_within_jitter_bounds():
+    random.seed(1)
+    errors = [UpstreamError(503, "unavailable"), httpx.ConnectError("refused")]
+    for attempt in range(8):
+        delay = min(resilience.BACKOFF_BASE * 2 ** attempt, resilience.BACKOFF_CAP)
+        for error in errors:
+            for _ in range(20):
+                assert delay / 2 <= retry_delay(error, attempt) <= delay
+
+
+def failing():
+    return UpstreamError(502, "bad gateway")
+
+
+def test_breaker_opens_then_lets_one_probe_through():
+    breaker = CircuitBreaker("test/model", threshold=2, cooldown=0.05)
+    breaker.check()
+    breaker.record_failure(failing())
+    assert breaker.state == "closed"
+    breaker.record_failure(failing())
+    assert breaker.state == "open" and breaker.retry_in() > 0
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open" and breaker.retry_in() == 0
+    breaker.check()  # The probe
+    with pytest.raises(CircuitOpenError):
+        breaker.check()  # Everyone else waits for its verdict
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+    breaker.check()
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker("test/model", threshold=1, cooldown=0.05)
+    breaker.record_failure(failing())
+    time.sleep(0.06)
+    breaker.check()
+    breaker.record_failure(failing())
+    assert breaker.state == "open"
+
+
+def test_cancelled_probe_is_released():
+    breaker = CircuitBreaker("test/model", threshold=1, cooldown=0.05)
+    breaker.record_failure(failing())
+    time.sleep(0.06)
+    breaker.check()
+    breaker.release()
+    assert breaker.state == "half-open"
+    breaker.check()  # The next call may probe
+
+
+def test_our_own_errors_are_not_upstream_failures():
+    breaker = CircuitBreaker("test/model", threshold=1, cooldown=30)
+    breaker.record_failure(UpstreamError(400, "bad request"))
+    breaker.record_failure(UpstreamError(401, "no key"))
+    assert breaker.state == "closed" and breaker.failures == 0
+    breaker.check()
@@ -0,0 +1,33 @@
+import asyncio
+import logging
+
+import runall
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(record.getMessage())
+
+
+def test_drain_output_survives_overlong_lines():
+    async def main():
+        stream = asyncio.StreamReader(limit=16)
+        stream.feed_data(b"short\n" + b"x" * 50 + b"\nafter\nno newline")
+        stream.feed_eof()
+        logger = logging.getLogger("tests.drain")
+        logger.setLevel(logging.INFO)
+        handler = Collect()
+        logger.addHandler(handler)
+        try:
+            await asyncio.wait_for(runall.drain_output(stream, logger), 1)
+        finally:
+            logger.removeHandler(handler)
+        assert handler.lines[0] == "short"
+        assert "".join(handler.lines[1:-2]) == "x" * 50
+        assert handler.lines[-2:] == ["after", "no newline"]
+
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+import asyncio
+
+from botcore.scheduler import Scheduler
+
+
+async def started_scheduler():
+    scheduler = Scheduler()
+    scheduler.start()
+    return scheduler
+
+
+def test_expiry_runs_in_deadline_order():
+    async def main():
+        scheduler = await started_scheduler()
+        fired = []
+        for key, delay in [("b", 0.06), ("a", 0.02), ("c", 0.1)]:
+            scheduler.expire_after(key, delay, lambda key=key: asyncio.sleep(0, fired.append(key)))
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        assert fired == ["a", "b", "c"]
+
+    asyncio.run(main())
+
+
+def test_rearm_pushes_the_deadline_back_and_forward():
+    async def main():
+        scheduler = await started_scheduler()
+        fired = []
+
+        def expire(key):
+            return lambda: asyncio.sleep(0, fired.append(key))
+
+        scheduler.expire_after("late", 0.05, expire("late"))
+        scheduler.expire_after("early", 0.5, expire("early"))
+        await asyncio.sleep(0.03)
+        scheduler.expire_after("late", 0.1, expire("late"))  # Activity: later
+        scheduler.expire_after("early", 0.01, expire("early"))  # Sooner than the sleeping deadline
+        await asyncio.sleep(0.04)
+        assert fired == ["early"]
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+        assert fired == ["early", "late"]
+
+    asyncio.run(main())
+
+
+def test_cancelled_expiry_never_runs():
+    async def main():
+        scheduler = await started_scheduler()
+        fired = []
+        scheduler.expire_after("gone", 0.02, lambda: asyncio.sleep(0, fired.append("gone")))
+        scheduler.cancel_expiry("gone")
+        scheduler.cancel_expiry("never armed")
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        assert fired == []
+
+    asyncio.run(main())
+
+
+def test_failing_callback_does_not_stop_expiry():
+    async def main():
+        scheduler = await started_scheduler()
+        fired = []
+
+        async def broken():
+            raise RuntimeError("boom")
+
+        scheduler.expire_after("broken", 0.01, broken)
+        scheduler.expire_after("fine", 0.03, lambda: asyncio.sleep(0, fired.append("fine")))
+        await asyncio.sleep(0.06)
+        await scheduler.stop()
+        assert fired == ["fine"]
+
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+import asyncio
+import sqlite3
+
+from botcore import session_db
+from botcore.session_db import SessionDB
+from botcore.sessions import SessionStore
+
+SYSTEM = {"role": "system", "content": "You are a coach."}
+
+
+def rows(path, sql):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(sql).fetchall()
+
+
+async def started(path):
+    store = SessionStore(SessionDB(path))
+    await store.start()
+    return store, store.for_persona("Dominus")
+
+
+def test_writes_are_batched_behind_and_survive_a_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_db, "BATCH_INTERVAL", 0.01)
+    path = str(tmp_path / "sessions.db")
+
+    async def first_run():
+        store, registry = await started(path)
+        session = registry.open(1, 100, [SYSTEM], "!dominus")
+        registry.append(session, "user", "hi")
+        registry.append(session, "assistant", "hello")
+        registry.save_summary(session, "They said hi.", 1)
+        assert rows(path, "SELECT COUNT(*) FROM turns") == [(0,)]  # Only queued so far
+        await asyncio.sleep(0.1)
+        assert rows(path, "SELECT role, content FROM turns ORDER BY id") == [("user", "hi"), ("assistant", "hello")]
+        registry.touch(session)
+        touched = session.last_active.timestamp()
+        await store.close()  # Flushes the touch still queued
+        assert rows(path, "SELECT last_active FROM sessions") == [(touched,)]
+        return touched
+
+    async def second_run(touched):
+        store, registry = await started(path)
+        [(user_id, last_active)] = await registry.load_dormant()
+        assert user_id == 1 and last_active.timestamp() == touched
+        assert 1 in registry and len(registry) == 1
+        assert registry.is_dormant(1) and registry.by_user(1) is None
+        assert registry.channel_of(1) == 100 and registry.mode_of(1) == "!dominus"
+
+        session = await registry.restore(1, SYSTEM)
+        assert session.context == [SYSTEM, {"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+        assert (session.mode, session.summary, session.summarized) == ("!dominus", "They said hi.", 1)
+        assert not registry.is_dormant(1)
+        assert registry.by_channel(100) is session and registry.by_user(1) is session
+
+        registry.close(1)
+        await store.close()
+        assert rows(path, "SELECT COUNT(*) FROM sessions") == [(0,)]
+        assert rows(path, "SELECT COUNT(*) FROM turns") == [(0,)]
+
+    asyncio.run(second_run(asyncio.run(first_run())))
+
+
+def test_session_closed_while_it_is_loading(tmp_path):
+    path = str(tmp_path / "sessions.db")
+
+    async def main():
+        store, registry = await started(path)
+        session = registry.open(1, 100, [SYSTEM], "!dominus")
+        registry.append(session, "user", "hi")
+        await store.close()
+
+        store, registry = await started(path)
+        await registry.load_dormant()
+        restoring = asyncio.create_task(registry.restore(1, SYSTEM))
+        await asyncio.sleep(0)  # Now reading the turns
+        registry.close(1)
+        assert await restoring is None
+        assert 1 not in registry and registry.by_channel(100) is None
+        await store.close()
+        assert rows(path, "SELECT COUNT(*) FROM sessions") == [(0,)]
+
+    asyncio.run(main())
+
+
+def test_concurrent_restores_share_one_load(tmp_path):
+    path = str(tmp_path / "sessions.db")
+
+    async def main():
+        store, registry = await started(path)
+        registry.open(1, 100, [SYSTEM])
+        await store.close()
+
+        store, registry = await started(path)
+        await registry.load_dormant()
+        first, second = await asyncio.gather(registry.restore(1, SYSTEM), registry.restore(1, SYSTEM))
+        assert first is second and first.context == [SYSTEM]
+        await store.close()
+
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+import json
+
+from botcore.sse import DONE, ResumeFilter, SentenceSplitter, SSEParser, delta_content
+
+
+def feed_all(chunks):
+    parser = SSEParser()
+    events = []
+    for chunk in chunks:
+        events += parser.feed(chunk)
+    return events + parser.close()
+
+
+def test_events_split_at_every_byte():
+    stream = b'data: {"a": 1}\n\ndata: {"a": 2}\n\ndata: [DONE]\n\n'
+    whole = feed_all([stream])
+    assert whole == [b'{"a": 1}', b'{"a": 2}', DONE]
+    assert feed_all([stream[i:i + 1] for i in range(len(stream))]) == whole
+
+
+def test_crlf_split_across_chunks():
+    # A \r ending one chunk and its \n opening the next is one line break
+    assert feed_all([b"data: one\r", b"\n\r", b"\ndata: two\r\n\r\n"]) == [b"one", b"two"]
+    assert feed_all([b"data: lone\r\r"]) == [b"lone"]
+
+
+def test_multi_line_data_comments_and_fields():
+    stream = b": OPENROUTER PROCESSING\n\nevent: message\nid: 7\ndata:first\ndata: second\n\n"
+    assert feed_all([stream]) == [b"first\nsecond"]
+
+
+def test_unterminated_event_is_flushed_on_close():
+    parser = SSEParser()
+    assert parser.feed(b"data: [DONE]") == []
+    assert parser.close() == [DONE]
+    assert parser.close() == []
+
+
+def test_delta_content():
+    chunk = json.dumps({"choices": [{"delta": {"content": "Hi"}}]}).encode()
+    assert delta_content(chunk) == "Hi"
+    assert delta_content(b'{"choices": [{"delta": {"role": "assistant"}}]}') == ""
+    assert delta_content(b'{"error": "nope"}') is None
+    assert delta_content(b"not json") is None
+
+
+def test_sentence_splitter():
+    splitter = SentenceSplitter()
+    out = [splitter.feed(t) for t in ["Hello", " there", ". ", "Dr", ".", "Who? ", "line\n", "tail"]]
+    assert out == [None, None, "Hello there. ", None, None, "Dr.Who? ", "line\n", None]
+    assert splitter.rest() == "tail"
+    assert splitter.text() == "Hello there. Dr.Who? line\ntail"
+
+
+def run_filter(delivered, tokens, window=20):
+    resume = ResumeFilter(delivered, window=window)
+    out = "".join(resume.feed(t) for t in tokens) + resume.flush()
+    return out, resume.dropped
+
+
+def test_resume_passes_a_true_continuation():
+    assert run_filter("The first part was said. ", ["And then ", "the rest ", "followed."]) == (
+        "And then the rest followed.", 0
+    )
+
+
+def test_resume_drops_a_restart_from_the_top():
+    delivered = "The first part was said. "
+    out, dropped = run_filter(delivered, ["The first ", "part was said. ", "Then more."])
+    assert out == "Then more."
+    assert dropped == len(delivered)
+
+
+def test_resume_drops_a_repeated_tail():
+    out, dropped = run_filter("We walked down to the river. ", ["to the river. ", "It was cold ", "that night."])
+    assert out == "It was cold that night."
+    assert dropped == len("to the river. ")
+
+
+def test_resume_flushes_a_short_reply():
+    assert run_filter("Something said before. ", ["Done."]) == ("Done.", 0)
+    assert run_filter("", ["Anything"]) == ("Anything", 0)
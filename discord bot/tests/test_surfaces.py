@@ -0,0 +1,78 @@
+import asyncio
+import types
+
+import discord
+
+from fake_discord import FakeMessage, FakeThread, FakeUser
+
+from botcore.metrics import counter_value
+from botcore.persona import PersonaBot
+from botcore.session_db import SessionDB
+from botcore.sessions import SessionStore
+
+
+def test_thread_session_opens_and_closes(harness):
+    async def main():
+        async with harness(surface="thread") as h:
+            user, session, thread = await h.open()
+            assert isinstance(thread, FakeThread) and thread.parent is h.lobby
+            assert user in thread.members and session.channel_id == thread.id
+            await h.say(user, thread, "!close")
+            assert h.guild.get_channel(thread.id) is None
+            assert user.id not in h.bot.sessions
+
+    asyncio.run(main())
+
+
+def test_thread_is_deleted_when_its_owner_cannot_be_added(harness, monkeypatch):
+    async def forbidden(thread, user):
+        raise discord.Forbidden(types.SimpleNamespace(status=403, reason="Forbidden"), "Missing Access")
+
+    monkeypatch.setattr(FakeThread, "add_user", forbidden)
+
+    async def main():
+        async with harness(surface="thread") as h:
+            name = h.bot.persona.name
+            created = counter_value("discord_threads_created", persona=name)
+            deleted = counter_value("discord_threads_deleted", persona=name)
+            user = FakeUser(h.api, 1)
+            await h.bot.on_message(FakeMessage(h.lobby, user, h.command))
+            assert h.guild.threads == {}
+            assert h.api.calls["delete_thread"] == 1
+            assert counter_value("discord_threads_created", persona=name) - created == 1
+            assert counter_value("discord_threads_deleted", persona=name) - deleted == 1
+            assert 1 not in h.bot.sessions
+            assert "could not be added" in h.lobby.messages[-1]
+
+    asyncio.run(main())
+
+
+def test_dormant_thread_session_closes_as_a_thread(harness, tmp_path):
+    path = str(tmp_path / "sessions.db")
+
+    async def main():
+        async with harness(surface="thread") as h:
+            user, session, thread = await h.open()
+            name = h.bot.persona.name
+            store = SessionStore(SessionDB(path))
+            await store.start()
+            store.for_persona(name).open(user.id, thread.id, session.context, session.mode)
+            await store.close()
+
+            # The next run only knows the session from the database
+            store = SessionStore(SessionDB(path))
+            await store.start()
+            bot = PersonaBot(h.bot.persona, "fake-token", "fake-key", store.for_persona(name), h.scheduler)
+            bot.client.get_channel = h.guild.get_channel
+            await bot.restore_sessions()
+            assert bot.sessions.is_dormant(user.id)
+            channels = counter_value("discord_channels_deleted", persona=name)
+            threads = counter_value("discord_threads_deleted", persona=name)
+            await bot.expire_session(user.id)
+            assert h.guild.get_channel(thread.id) is None
+            assert counter_value("discord_threads_deleted", persona=name) - threads == 1
+            assert counter_value("discord_channels_deleted", persona=name) == channels
+            assert user.id not in bot.sessions
+            await store.close()
+
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+import asyncio
+
+
+def test_messages_in_a_row_are_one_turn(harness):
+    async def main():
+        async with harness() as h:
+            user, session, channel = await h.open()
+            await h.say(user, channel, "first")
+            await h.say(user, channel, "second")
+            await session.turn_task
+            assert len(h.requests) == 1
+            assert h.requests[0]["messages"][-1] == {"role": "user", "content": "first\n\nsecond"}
+            assert session.context[-1] == {"role": "assistant", "content": "Hello there. How are you?"}
+
+    asyncio.run(main())
+
+
+def test_stop_during_debounce_sends_nothing(harness):
+    async def main():
+        async with harness() as h:
+            user, session, channel = await h.open()
+            posted = len(channel.messages)
+            await h.say(user, channel, "hello")
+            await asyncio.sleep(0.01)  # run_turns is now in its debounce wait
+            await h.say(user, channel, "!stop")
+            await session.turn_task
+            assert h.requests == []
+            assert [m["role"] for m in session.context] == ["system"]
+            assert channel.messages[posted:] == []
+
+    asyncio.run(main())
+
+
+def test_stop_with_nothing_running_is_ignored(harness):
+    async def main():
+        async with harness() as h:
+            user, session, channel = await h.open()
+            posted = len(channel.messages)
+            await h.say(user, channel, "!stop")
+            assert channel.messages[posted:] == []
+            await h.say(user, channel, "hello")
+            await session.turn_task
+            assert len(h.requests) == 1
+            assert session.context[-1]["role"] == "assistant"
+
+    asyncio.run(main())
+
+
+def test_message_during_debounce_restarts_the_wait(harness):
+    async def main():
+        async with harness() as h:
+            user, session, channel = await h.open()
+            await h.say(user, channel, "one")
+            await asyncio.sleep(0.03)
+            await h.say(user, channel, "two")
+            await asyncio.sleep(0.03)  # Past the first message's debounce, not the second's
+            assert h.requests == []
+            await session.turn_task
+            assert [r["messages"][-1]["content"] for r in h.requests] == ["one\n\ntwo"]
+
+    asyncio.run(main())
+
+
+def test_new_message_supersedes_streaming_reply(harness):
+    async def main():
+        async with harness(tokens=["One. ", "Two. ", "Three. ", "Four."], delay=0.1) as h:
+            user, session, channel = await h.open()
+            await h.say(user, channel, "first")
+            while not h.requests:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.15)
+            await h.say(user, channel, "second")
+            await session.turn_task
+            assert len(h.requests) == 2
+            roles = [m["role"] for m in session.context]
+            assert roles == ["system", "user", "assistant", "user", "assistant"]
+            assert session.context[-1]["content"] == "One. Two. Three. Four."
+
+    asyncio.run(main())
+
+
+def test_stopped_reply_keeps_only_what_was_shown(harness):
+    async def main():
+        tokens = ["One. ", "Two. ", "Three. ", "Four. ", "Five."]
+        async with harness(tokens=tokens, delay=0.1) as h:
+            user, session, channel = await h.open()
+            posted = len(channel.messages)
+            await h.say(user, channel, "go")
+            while not h.requests:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.25)
+            await h.say(user, channel, "!stop")
+            await session.turn_task
+            kept = session.context[-1]
+            assert kept["role"] == "assistant"
+            assert kept["content"] and "Five." not in kept["content"]
+            # Posted before the confirmation, word for word what is kept
+            thinking = h.bot.persona.thinking_message  # Deleted after a few seconds
+            shown = [m for m in channel.messages[posted:] if m != thinking]
+            assert shown[-1] == "⏹️ Stopped."
+            assert "\n".join(shown[:-1]) == kept["content"]
+
+    asyncio.run(main())